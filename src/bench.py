@@ -0,0 +1,198 @@
+import argparse
+import random
+import sys
+import tempfile
+import time
+import torch
+from copy import deepcopy
+
+from fuzz.builtin import load_probes
+from fuzz.frag import FragFactory
+from fuzz.fuzz import Fuzzer
+from fuzz.resolve import hoisting
+from fuzz.resolve import init_symbols
+from fuzz.resolve import resolve_id
+from fuzz.resolve import update_builtins
+from fuzz.resolve import update_harness
+from fuzz.resolve_bug import ResolveBug
+from utils import hash_frag
+from utils import list_dir
+from utils import load_ast
+from utils import set_hash_mode
+from utils.config import Config
+from utils.dataset import Dataset
+from utils.harness import HarnessIndex
+from utils.logger import print_msg
+from utils.print import CodePrinter
+from utils.print import NativePrinter
+from utils.print import get_printer
+
+# Number of programs generated per round
+GEN_PROGRAMS = 100
+# Number of seeds concatenated into a program
+RESOLVE_SIZES = [1, 16, 64, 256]
+
+def bench(name, func, frag_list, rounds):
+  start = time.time()
+  for _ in range(rounds):
+    for frag in frag_list:
+      func(frag)
+  elapsed = time.time() - start
+  per_frag = elapsed / (rounds * len(frag_list)) * 1e6
+  msg = '%s: %.2fs (%.2f us/frag)' % (name, elapsed, per_frag)
+  print_msg(msg, 'INFO')
+
+def bench_frag(conf, rounds):
+  frag_list = load_frags(conf)
+  msg = '%d fragments, %d rounds' % (len(frag_list), rounds)
+  print_msg(msg, 'INFO')
+
+  factory = FragFactory()
+  start = time.time()
+  for frag in frag_list:
+    factory.new(frag)
+  msg = 'compile: %.2fs' % (time.time() - start)
+  print_msg(msg, 'INFO')
+
+  bench('deepcopy', deepcopy, frag_list, rounds)
+  bench('FragFactory', factory.new, frag_list, rounds)
+
+def bench_gen(conf, rounds):
+  # Programs per second of the generation loop of a fuzzing process,
+  # without executing them, on the CPU and on CUDA if available
+  devices = ['cpu']
+  if torch.cuda.is_available():
+    devices += ['cuda']
+  msg = '%d programs, %d threads' % (rounds * GEN_PROGRAMS,
+                                    conf.num_threads)
+  print_msg(msg, 'INFO')
+
+  conf.infer_server = False
+  for device in devices:
+    conf.device = device
+    with tempfile.TemporaryDirectory() as bug_dir:
+      conf.bug_dir = bug_dir
+      fuzzer = Fuzzer(0, conf, launch_time=time.time())
+      model = fuzzer.init_model()
+      printer = get_printer(conf.printer)
+      random.seed(0)
+      torch.manual_seed(0)
+
+      num_fails = 0
+      start = time.time()
+      for _ in range(rounds * GEN_PROGRAMS):
+        if fuzzer.gen_js(printer, model) == None:
+          num_fails += 1
+      elapsed = time.time() - start
+      fuzzer.close()
+    msg = '%s: %.1f programs/s (%d failed)'
+    msg = msg % (device, rounds * GEN_PROGRAMS / elapsed, num_fails)
+    print_msg(msg, 'INFO')
+
+def bench_hash(conf, rounds):
+  # Every fragment occurrence in the preprocessed corpus
+  dataset = Dataset(conf.data_dir)
+  seed_dict, frag_list = dataset.seed_dict(), dataset.frag_list()
+  corpus = [frag_list[frag_idx]
+            for seed_name in seed_dict.keys()
+            for frag_idx in seed_dict[seed_name][0]]
+  msg = '%d fragments (%d unique), %d rounds'
+  msg = msg % (len(corpus), len(frag_list), rounds)
+  print_msg(msg, 'INFO')
+
+  for hash_mode in ['legacy', 'fast']:
+    set_hash_mode(hash_mode)
+    bench(hash_mode, hash_frag, corpus, rounds)
+    keys = set(hash_frag(frag) for frag in frag_list)
+    msg = '%s: %d distinct keys' % (hash_mode, len(keys))
+    print_msg(msg, 'INFO')
+
+def bench_print(conf, rounds):
+  # Prints the parsed seeds with escodegen and with the native printer
+  ast_list = [load_ast(ast_path)[1]
+              for ast_path in list_dir(conf.ast_dir)]
+  msg = '%d programs, %d rounds' % (len(ast_list), rounds)
+  print_msg(msg, 'INFO')
+
+  outputs = {}
+  for name, printer in [('node', CodePrinter()),
+                        ('native', NativePrinter())]:
+    start = time.time()
+    for _ in range(rounds):
+      outputs[name] = [printer.ast2code(ast) for ast in ast_list]
+    elapsed = time.time() - start
+    per_program = elapsed / (rounds * len(ast_list)) * 1e3
+    msg = '%s: %.2fs (%.3f ms/program)' % (name, elapsed, per_program)
+    print_msg(msg, 'INFO')
+
+  num_diffs = sum(node_code != native_code for node_code, native_code
+                  in zip(outputs['node'], outputs['native']))
+  msg = '%d programs printed differently' % num_diffs
+  print_msg(msg, 'WARN' if num_diffs > 0 else 'INFO')
+
+def bench_resolve(conf, rounds):
+  # Resolves identifiers as Fuzzer.resolve_errors does, on programs
+  # that concatenate the bodies of random seeds
+  update_builtins(load_probes(conf.eng_path, conf.builtin_dir))
+  update_harness(HarnessIndex(conf.harness_path))
+  ast_list = [load_ast(ast_path)[1]
+              for ast_path in list_dir(conf.ast_dir)]
+  rng = random.Random(0)
+
+  for num_seeds in RESOLVE_SIZES:
+    body = []
+    for ast in rng.sample(ast_list, min(num_seeds, len(ast_list))):
+      body += ast['body']
+    program = {'type': 'Program', 'body': body}
+
+    elapsed, num_fails = 0, 0
+    for _ in range(rounds):
+      root = deepcopy(program)
+      random.seed(0)
+      start = time.time()
+      try:
+        symbols = hoisting(root, init_symbols(), True)
+        resolve_id(root, None, symbols, True,
+                   cand=[], hlist=[])
+      except ResolveBug:
+        num_fails += 1
+      elapsed += time.time() - start
+    msg = '%d seeds, %d statements: %.2fms/program (%d failed)'
+    msg = msg % (num_seeds, len(body), elapsed / rounds * 1e3, num_fails)
+    print_msg(msg, 'INFO')
+
+def get_args():
+  arg_parser = argparse.ArgumentParser()
+  arg_parser.add_argument('--opt', required=True,
+                          choices=['frag', 'gen', 'hash', 'print',
+                                   'resolve'])
+  arg_parser.add_argument('--config', required=True)
+  arg_parser.add_argument('--rounds', type=int, default=1)
+  return arg_parser.parse_args(sys.argv[1:])
+
+def load_frags(conf):
+  dataset = Dataset(conf.data_dir)
+  new_frag_list = dataset.new_frag_list()
+  oov_pool = dataset.oov_pool()
+  frag_list = [frag for frag in new_frag_list
+               if type(frag) == dict]
+  for frags in oov_pool.values():
+    frag_list += frags
+  return frag_list
+
+def main():
+  args = get_args()
+  conf = Config(args.config)
+  if args.opt == 'frag':
+    bench_frag(conf, args.rounds)
+  elif args.opt == 'gen':
+    bench_gen(conf, args.rounds)
+  elif args.opt == 'hash':
+    bench_hash(conf, args.rounds)
+  elif args.opt == 'print':
+    bench_print(conf, args.rounds)
+  elif args.opt == 'resolve':
+    bench_resolve(conf, args.rounds)
+
+if __name__ == '__main__':
+  main()
@@ -1,3 +1,7 @@
+import json
+import os
+from hashlib import sha256
+from subprocess import DEVNULL
 from subprocess import PIPE
 from subprocess import Popen
 
@@ -76,67 +80,92 @@ BUILTIN_OBJS = [
   '__defineSetter__',
 ]
 
+# Output of each probe script
+PROBES = {
+  'array_props': 'utils/array_getter.js',
+  'func_props': 'utils/func_getter.js',
+  'globs': 'utils/global_getter.js',
+  'obj_props': 'utils/obj_getter.js',
+  'regex_props': 'utils/regex_getter.js',
+  'str_props': 'utils/str_getter.js',
+}
+
 class BuiltIn:
   def __init__(self):
-    self.ARRAYS  = BUILTIN_ARRAYS
+    self.ARRAYS = set(BUILTIN_ARRAYS)
     self.BUILTINS = BUILTINS
-    self.FUNCS = BUILTIN_FUNCS
-    self.OBJS = BUILTIN_OBJS
+    self.FUNCS = set(BUILTIN_FUNCS)
+    self.OBJS = set(BUILTIN_OBJS)
     self.SYMS = []
 
-  def get_props(self, eng_path):
-    array_props = exec_eng(eng_path, 'utils/array_getter.js')
-    self.array_props = self.process_out(array_props)
-
-    func_props = exec_eng(eng_path, 'utils/func_getter.js')
-    self.func_props = self.process_out(func_props)
-
-    obj_props = exec_eng(eng_path, 'utils/obj_getter.js')
-    self.obj_props = self.process_out(obj_props)
-
-    regex_props = exec_eng(eng_path, 'utils/regex_getter.js')
-    self.regex_props = self.process_out(regex_props)
-
-    str_props = exec_eng(eng_path, 'utils/str_getter.js')
-    self.str_props = self.process_out(str_props)
-
-  def build_resolve_pattern(self, eng_path):
-    self.get_props(eng_path)
+  def build_resolve_pattern(self, probes):
+    obj_props = set(probes['obj_props'])
     self.resolve_pattern = {}
-    for props, ty in [
-      (self.array_props, JSType.js_array),
-      (self.str_props, JSType.js_string),
-      (self.regex_props, JSType.js_regex),
-      (self.func_props, JSType.js_func),
+    for key, ty in [
+      ('array_props', JSType.js_array),
+      ('str_props', JSType.js_string),
+      ('regex_props', JSType.js_regex),
+      ('func_props', JSType.js_func),
     ]:
-      for x in props:
-        if x not in self.obj_props:
+      for x in probes[key]:
+        if x not in obj_props:
           if x not in self.resolve_pattern:
             self.resolve_pattern[x] = []
           self.resolve_pattern[x] += [ty]
 
-  def process_out(self, stdout):
-    stdout = stdout.decode('utf-8')
-    stdout = stdout.split()
-    stdout = list(set(stdout))
-    return stdout
-
-  def update_builtins(self, eng_path):
-    globs = exec_eng(eng_path, 'utils/global_getter.js')
-    globs = self.process_out(globs)
-    self.OBJS = [x for x in self.OBJS if x in globs]
-    self.FUNCS = [x for x in self.FUNCS if x in globs]
+  def update_builtins(self, probes):
+    globs = set(probes['globs'])
+    objs = [x for x in BUILTIN_OBJS if x in globs]
+    funcs = [x for x in BUILTIN_FUNCS if x in globs]
+    self.OBJS = set(objs)
+    self.FUNCS = set(funcs)
 
-    for x in self.OBJS + self.ARRAYS:
+    for x in objs + BUILTIN_ARRAYS:
       self.BUILTINS[x] = JSType.js_object
-    for x in self.FUNCS:
+    for x in funcs:
       self.BUILTINS[x] = JSType.js_func
 
     for sym, ty in self.BUILTINS.items():
       self.SYMS.append(Symbol(sym, None, ty))
 
-def exec_eng(eng_path, js_path):
-  cmd = [eng_path, js_path]
-  proc = Popen(cmd, stdout=PIPE, stderr=PIPE)
-  stdout, _ = proc.communicate()
-  return stdout
+def get_cache_path(eng_path, cache_dir):
+  # Keyed by the engine binary and the probe scripts
+  digest = sha256()
+  for path in [eng_path] + sorted(PROBES.values()):
+    with open(path, 'rb') as f:
+      for chunk in iter(lambda: f.read(1 << 20), b''):
+        digest.update(chunk)
+  cache_name = 'builtins.%s.json' % digest.hexdigest()[:16]
+  return os.path.join(cache_dir, cache_name)
+
+def load_probes(eng_path, cache_dir):
+  cache_path = get_cache_path(eng_path, cache_dir)
+  if os.path.exists(cache_path):
+    with open(cache_path) as f:
+      return json.load(f)
+
+  probes = run_probes(eng_path)
+  if not os.path.exists(cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+  # Workers may probe the same engine concurrently
+  tmp_path = '%s.%d' % (cache_path, os.getpid())
+  with open(tmp_path, 'w') as f:
+    json.dump(probes, f)
+  os.replace(tmp_path, cache_path)
+  return probes
+
+def process_out(stdout):
+  stdout = stdout.decode('utf-8')
+  return sorted(set(stdout.split()))
+
+def run_probes(eng_path):
+  # The probes run in parallel
+  procs = {}
+  for key, js_path in PROBES.items():
+    procs[key] = Popen([eng_path, js_path],
+                       stdout=PIPE, stderr=DEVNULL)
+  probes = {}
+  for key, proc in procs.items():
+    stdout, _ = proc.communicate()
+    probes[key] = process_out(stdout)
+  return probes
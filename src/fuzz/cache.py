@@ -0,0 +1,130 @@
+import sys
+from collections import OrderedDict
+from enum import Enum
+from types import BuiltinFunctionType
+from types import FunctionType
+from types import ModuleType
+
+# Objects that are shared by every layout
+SHARED_TYPES = (type(None), bool, type, BuiltinFunctionType,
+                FunctionType, ModuleType, Enum)
+
+class TrieNode:
+  def __init__(self, parent, frag_idx):
+    self.children = {}
+    self.frag_idx = frag_idx
+    self.hidden = None
+    self.parent = parent
+
+class HiddenCache:
+  def __init__(self, max_size):
+    self._lru = OrderedDict()
+    self._max_size = max_size
+    self._num_bytes = 0
+    self._num_nodes = 0
+    self._root = TrieNode(None, None)
+
+  def evict(self):
+    node, _ = self._lru.popitem(last=False)
+    self._num_bytes -= hidden_size(node.hidden)
+    node.hidden = None
+
+    # Prune the branch that no longer leads to a hidden state
+    while (node.parent is not None and
+           node.hidden is None and
+           len(node.children) == 0):
+      del node.parent.children[node.frag_idx]
+      self._num_nodes -= 1
+      node = node.parent
+
+  def insert(self, prefix, hidden):
+    if self._max_size <= 0:
+      return
+
+    node = self._root
+    for frag_idx in prefix:
+      if frag_idx not in node.children:
+        node.children[frag_idx] = TrieNode(node, frag_idx)
+        self._num_nodes += 1
+      node = node.children[frag_idx]
+
+    if node.hidden is None:
+      self._num_bytes += hidden_size(hidden)
+    node.hidden = hidden
+    self._lru[node] = None
+    self._lru.move_to_end(node)
+    while len(self._lru) > self._max_size:
+      self.evict()
+
+  def lookup(self, prefix):
+    # Find the deepest cached node along the prefix
+    node = self._root
+    depth, hit = 0, None
+    for idx, frag_idx in enumerate(prefix):
+      node = node.children.get(frag_idx)
+      if node is None:
+        break
+      if node.hidden is not None:
+        depth, hit = idx + 1, node
+
+    if hit is None:
+      return 0, None
+    self._lru.move_to_end(hit)
+    return depth, hit.hidden
+
+  def memory(self):
+    return self._num_nodes, self._num_bytes
+
+class SeedCache:
+  def __init__(self, max_bytes):
+    self._lru = OrderedDict()
+    self._max_bytes = max_bytes
+    self._num_bytes = 0
+
+  def get(self, seed_name):
+    if seed_name not in self._lru:
+      return None
+    self._lru.move_to_end(seed_name)
+    layout, _ = self._lru[seed_name]
+    return layout
+
+  def insert(self, seed_name, layout):
+    layout_bytes = layout_size(layout)
+    if layout_bytes > self._max_bytes:
+      return
+
+    self._lru[seed_name] = layout, layout_bytes
+    self._num_bytes += layout_bytes
+    while self._num_bytes > self._max_bytes:
+      _, (_, old_bytes) = self._lru.popitem(last=False)
+      self._num_bytes -= old_bytes
+
+  def memory(self):
+    return len(self._lru), self._num_bytes
+
+def deep_size(obj):
+  # Every object reachable from obj is counted once
+  seen, stack, num_bytes = set(), [obj], 0
+  while stack:
+    obj = stack.pop()
+    if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+      continue
+    seen.add(id(obj))
+    num_bytes += sys.getsizeof(obj)
+    if type(obj) == dict:
+      stack.extend(obj.keys())
+      stack.extend(obj.values())
+    elif type(obj) in (list, tuple, set, frozenset):
+      stack.extend(obj)
+    elif hasattr(obj, '__dict__'):
+      stack.append(obj.__dict__)
+  return num_bytes
+
+def hidden_size(hidden):
+  return sum(x.element_size() * x.nelement() for x in hidden)
+
+def layout_size(layout):
+  # The trace of a seed holds its nodes and symbol tables, while the
+  # other columns are flat
+  num_bytes = sum(sys.getsizeof(column) for column in layout[:-1])
+  return num_bytes + deep_size(layout[-1])
@@ -0,0 +1,194 @@
+import mmap
+import os
+import select
+import signal
+import struct
+from subprocess import PIPE
+from subprocess import Popen
+
+from utils import random_string
+from utils import write
+from utils.logger import print_msg
+from utils.watchdog import get_watchdog
+
+# File descriptors of the REPRL (read-eval-print-reset loop) interface
+REPRL_CRFD = 100
+REPRL_CWFD = 101
+REPRL_DRFD = 102
+REPRL_DWFD = 103
+
+REPRL_MAX_DATA_SIZE = 16 << 20
+
+class ProcessEngine:
+  def __init__(self, eng_path, opt, cwd, timeout, scratch):
+    self._eng_path = eng_path
+    self._opt = opt
+    self._cwd = cwd
+    self._timeout = timeout
+    self.timed_out = False
+
+    # Reused by every run of this engine
+    if scratch == 'memfd':
+      self._js_fd = os.memfd_create('montage_js')
+      self._js_path = '/proc/self/fd/%d' % self._js_fd
+    else:
+      self._js_fd = None
+      js_name = '.exec.%s.js' % random_string(10)
+      self._js_path = os.path.join(scratch, js_name)
+
+  def close(self):
+    if self._js_fd is not None:
+      os.close(self._js_fd)
+    elif os.path.exists(self._js_path):
+      os.remove(self._js_path)
+
+  def run(self, js_code):
+    if self._js_fd is not None:
+      # The engine opens the inherited memfd via /proc/self/fd
+      os.ftruncate(self._js_fd, 0)
+      os.pwrite(self._js_fd, js_code, 0)
+      pass_fds = [self._js_fd]
+    else:
+      write(self._js_path, js_code)
+      pass_fds = []
+    cmd = [self._eng_path] + self._opt + [self._js_path]
+    proc = Popen(cmd, cwd = self._cwd, pass_fds = pass_fds,
+                 stdout = PIPE, stderr = PIPE)
+    watchdog = get_watchdog()
+    watch = watchdog.watch(proc, self._timeout)
+    proc.communicate()
+    watchdog.cancel(watch)
+    self.timed_out = watch.timed_out
+    return proc.returncode
+
+class ReprlEngine:
+  def __init__(self, eng_path, opt, cwd, timeout, scratch):
+    self._eng_path = eng_path
+    self._opt = opt
+    self._cwd = cwd
+    self._timeout = timeout
+
+    self._pid = None
+    self.timed_out = False
+    self._fallback = ProcessEngine(eng_path, opt, cwd, timeout,
+                                   scratch)
+
+  def close(self):
+    if self._pid is not None:
+      self.kill()
+    self._fallback.close()
+
+  def kill(self):
+    try:
+      os.kill(self._pid, signal.SIGKILL)
+    except ProcessLookupError:
+      pass
+    return self.reap()
+
+  def reap(self):
+    _, status = os.waitpid(self._pid, 0)
+    for fd in [self._ctrl_r, self._ctrl_w,
+               self._data_fd, self._out_fd]:
+      os.close(fd)
+    self._data.close()
+    self._pid = None
+    return decode_status(status)
+
+  def run(self, js_code):
+    self.timed_out = False
+    if len(js_code) > REPRL_MAX_DATA_SIZE:
+      returncode = self._fallback.run(js_code)
+      self.timed_out = self._fallback.timed_out
+      return returncode
+
+    if self._pid is None:
+      self.spawn()
+
+    self._data.seek(0)
+    self._data.write(js_code)
+    action = b'cexe' + struct.pack('<Q', len(js_code))
+    try:
+      os.write(self._ctrl_w, action)
+    except BrokenPipeError:
+      return self.reap()
+
+    # Restart the engine after a timeout
+    ready, _, _ = select.select([self._ctrl_r], [], [],
+                                self._timeout)
+    if len(ready) == 0:
+      self.timed_out = True
+      self.kill()
+      return -signal.SIGKILL
+
+    # Restart the engine after a crash
+    status = read_fd(self._ctrl_r, 4)
+    if len(status) < 4:
+      return self.reap()
+
+    status, = struct.unpack('<i', status)
+    return decode_status(status)
+
+  def spawn(self):
+    # Pipes for the control messages
+    ctrl_r, child_w = os.pipe()
+    child_r, ctrl_w = os.pipe()
+
+    # Shared memory for the scripts and the engine outputs
+    data_fd = os.memfd_create('reprl_data')
+    out_fd = os.memfd_create('reprl_out')
+    for fd in [data_fd, out_fd]:
+      os.ftruncate(fd, REPRL_MAX_DATA_SIZE)
+
+    file_actions = [
+      (os.POSIX_SPAWN_DUP2, child_r, REPRL_CRFD),
+      (os.POSIX_SPAWN_DUP2, child_w, REPRL_CWFD),
+      (os.POSIX_SPAWN_DUP2, data_fd, REPRL_DRFD),
+      (os.POSIX_SPAWN_DUP2, out_fd, REPRL_DWFD),
+      (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+      (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+      (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+    ]
+    # posix_spawn cannot change the working directory
+    cmd = ['/bin/sh', '-c', 'cd "$0" && exec "$@"', self._cwd,
+           self._eng_path] + self._opt
+    self._pid = os.posix_spawn(cmd[0], cmd, os.environ,
+                               file_actions=file_actions)
+    os.close(child_r)
+    os.close(child_w)
+
+    self._ctrl_r = ctrl_r
+    self._ctrl_w = ctrl_w
+    self._data_fd = data_fd
+    self._out_fd = out_fd
+    self._data = mmap.mmap(data_fd, REPRL_MAX_DATA_SIZE)
+
+    # Handshake
+    ready, _, _ = select.select([ctrl_r], [], [], self._timeout)
+    helo = read_fd(ctrl_r, 4) if len(ready) > 0 else b''
+    if helo != b'HELO':
+      self.kill()
+      msg = 'REPRL handshake with %s failed' % self._eng_path
+      print_msg(msg, 'ERROR')
+      raise RuntimeError(msg)
+    os.write(ctrl_w, b'HELO')
+
+def decode_status(status):
+  # Return code of a wait status, as subprocess reports it
+  if os.WIFSIGNALED(status):
+    return -os.WTERMSIG(status)
+  return os.WEXITSTATUS(status)
+
+def get_engine(exec_mode, eng_path, opt, cwd, timeout, scratch):
+  if exec_mode == 'reprl':
+    return ReprlEngine(eng_path, opt, cwd, timeout, scratch)
+  else:
+    return ProcessEngine(eng_path, opt, cwd, timeout, scratch)
+
+def read_fd(fd, size):
+  buf = b''
+  while len(buf) < size:
+    chunk = os.read(fd, size - len(buf))
+    if len(chunk) == 0:
+      break
+    buf += chunk
+  return buf
@@ -0,0 +1,53 @@
+from utils import get_holes
+from utils import is_pruned
+
+class FragFactory:
+  def __init__(self):
+    self._ctors = {}
+    self._holes = {}
+
+  def get(self, frag):
+    # Fragments are kept alive by the fragment lists
+    ctor = self._ctors.get(id(frag))
+    if ctor is None:
+      ctor = compile_frag(frag)
+      self._ctors[id(frag)] = ctor
+    return ctor
+
+  def holes(self, frag):
+    holes = self._holes.get(id(frag))
+    if holes is None:
+      holes = get_holes(frag)
+      self._holes[id(frag)] = holes
+    return holes
+
+  def new(self, frag):
+    return self.get(frag)()
+
+def compile_frag(frag):
+  # Build a constructor that returns a fresh copy of the fragment.
+  # Holes are replaced rather than modified, and scalars are
+  # immutable, so they are shared by every copy.
+  shared = []
+  expr = gen_expr(frag, shared)
+  params = ', '.join('s%d' % idx for idx in range(len(shared)))
+  src = 'def make(%s):\n  return lambda: %s\n' % (params, expr)
+
+  namespace = {}
+  exec(src, namespace)
+  return namespace['make'](*shared)
+
+def gen_expr(value, shared):
+  value_type = type(value)
+  if value_type == dict and not is_pruned(value):
+    items = ['%r: %s' % (key, gen_expr(child, shared))
+             for key, child in value.items()]
+    return '{%s}' % ', '.join(items)
+  elif value_type == list:
+    items = [gen_expr(child, shared) for child in value]
+    return '[%s]' % ', '.join(items)
+  elif value_type in [bool, int, str] or value is None:
+    return repr(value)
+  else:
+    shared.append(value)
+    return 's%d' % (len(shared) - 1)
@@ -1,247 +1,439 @@
 import os
+import queue
 import random
+import signal
 import sys
 import threading
-from copy import deepcopy
-from subprocess import Popen
-from subprocess import PIPE
+import time
+from array import array
+from bisect import bisect_left
+from itertools import chain
 
 import torch
 from torch.multiprocessing import Pool
+from torch.multiprocessing import Process
+from torch.multiprocessing import Queue
+from torch.multiprocessing import get_context
 from torch.multiprocessing import set_start_method
 
+from fuzz.builtin import load_probes
+from fuzz.cache import HiddenCache
+from fuzz.cache import SeedCache
+from fuzz.engine import get_engine
+from fuzz.frag import FragFactory
+from fuzz.infer import get_client
+from fuzz.infer import init_client
+from fuzz.infer import serve
 from fuzz.resolve import hoisting
+from fuzz.resolve import Budget
+from fuzz.resolve import init_symbols
 from fuzz.resolve import resolve_id
+from fuzz.resolve import resolve_subtree
+from fuzz.resolve import set_budget
+from fuzz.resolve import trace_envs
 from fuzz.resolve import update_builtins
+from fuzz.resolve import update_harness
 from fuzz.resolve_bug import ResolveBug
+from fuzz.resolve_bug import ResolveOverrun
+from fuzz.ring import SampleRing
+from fuzz.stats import Stats
 from utils import data2tensor
 from utils import get_node_type
-from utils import hash_frag
+from utils import hash_val
 from utils import init_worker
-from utils import is_single_node
-from utils import is_node_list
-from utils import kill_proc
-from utils import load_pickle
 from utils import pool_map
+from utils import set_device
 from utils import trim_seed_name
-from utils.harness import Harness
+from utils import write
+from utils.dataset import Dataset
+from utils.harness import HarnessIndex
 from utils.logger import print_msg
-from utils.node import PROP_DICT
-from utils.node import TERM_TYPE
 from utils.node import get_define_node
 from utils.node import get_load_node
-from utils.print import CodePrinter
+from utils.print import get_printer
+
+# Number of JS files kept whose resolution ran out of budget
+OVERRUN_SAMPLES = 16
 
 class Fuzzer:
-  def __init__(self, proc_idx, conf):
+  def __init__(self, proc_idx, conf, shared=None, launch_time=None,
+               probes=None):
+    if conf.infer_server:
+      self._device = 'cpu'
+    else:
+      self._device = conf.device
     self._eng_path = conf.eng_path
+    self._exec_mode = conf.exec_mode
+    self._exec_queue_size = conf.exec_queue_size
+    self._exec_threads = conf.exec_threads
+    self._infer_server = conf.infer_server
+    self._max_backtracks = conf.max_backtracks
     self._max_ins = conf.max_ins
     self._num_gpu = conf.num_gpu
     self._model_path = conf.model_path
+    self._num_threads = conf.num_threads
     self._opt = conf.opt
+    self._printer = conf.printer
+    self._proc_idx = proc_idx
+    self._resolve_max_time = conf.resolve_max_time
+    self._resolve_max_visits = conf.resolve_max_visits
+    self._resolve_mode = conf.resolve_mode
+    self._resolve_overrun = conf.resolve_overrun
     self._seed_dir = conf.seed_dir
     self._bug_dir = os.path.join(conf.bug_dir,
                                  'proc.%d' % proc_idx)
+    self._scratch = conf.scratch_dir
     self._timeout = conf.timeout
     self._top_k = conf.top_k
+    self._launch_time = launch_time
+    self._local = threading.local()
+    self._engines = []
+
+    # Read-only state preloaded by the zygote
+    if shared is None:
+      seed, data = load_data(conf)
+      self._harness = HarnessIndex(conf.harness_path)
+      self._model = None
+    else:
+      (seed, data), self._harness, self._model = shared
 
-    self._harness = Harness(conf.seed_dir)
     if not os.path.exists(self._bug_dir):
       os.makedirs(self._bug_dir)
     log_path = os.path.join(self._bug_dir,
                             'logs.csv')
     self._crash_log = open(log_path, 'ab', 0)
+    ring_dir = os.path.join(self._bug_dir, 'recent')
+    self._ring = SampleRing(ring_dir, conf.sample_ring)
+    overrun_dir = os.path.join(self._bug_dir, 'overrun')
+    self._overrun_ring = SampleRing(overrun_dir, OVERRUN_SAMPLES)
+
+    if self._scratch is None:
+      self._scratch = self._bug_dir
+    elif (self._scratch != 'memfd' and
+          not os.path.exists(self._scratch)):
+      os.makedirs(self._scratch)
 
-    seed, data = load_data(conf)
     (self._seed_dict,
      self._frag_list,
      self._new_seed_dict) = seed
     (self._new_frag_list,
-     self._new_frag_dict,
+     self._new_frag_types,
      self._oov_pool,
-     self._type_dict) = data
-
-    self.assign_gpu(proc_idx)
-    update_builtins(conf.eng_path)
-
-  def append_frag(self, cand_list, valid_type, root, stack):
-    # Try all fragments in top k
-    while len(cand_list) > 0:
-      cand_idx = random.choice(cand_list)
-      cand_frag = self._new_frag_list[cand_idx]
-
-      if type(cand_frag) == dict:
-        cand_type = get_node_type(cand_frag)
-      else:
-        cand_type = cand_frag
-
-      if cand_type == valid_type:
-        parent_idx, frag_type = self.expand_ast(cand_frag,
-                                                stack, root)
-        frag = [cand_idx]
-        return True, frag, parent_idx, frag_type
-      else:
-        cand_list.remove(cand_idx)
-    return False, None, None, None
-
-  def assign_gpu(self, proc_idx):
-    gpu_idx = proc_idx % self._num_gpu
-    os.environ['CUDA_VISIBLE_DEVICES'] = '%d' % gpu_idx
-
-  def build_ast(self, node, stack, frag):
-    node_type = get_node_type(node)
-    for key in PROP_DICT[node_type]:
-      if key not in node: continue
-      child = node[key]
-
-      # If it has a single child
-      if is_single_node(child):
-        if not is_pruned(child):
-          frag = self.build_ast(child, stack, frag)
-        # Expand the frag
-        elif frag:
-          self.push(stack, frag)
-          node[key] = frag
-          return None
-      # If it has multiple children
-      elif is_node_list(child):
-        for idx, _child in enumerate(child):
-          if _child == None:
-            continue
-          elif not is_pruned(_child):
-            frag = self.build_ast(child[idx], stack, frag)
-          # Expand the frag
-          elif frag:
-            self.push(stack, frag)
-            child[idx] = frag
-            return None
-    return frag
+     self._type_dict,
+     self._closers) = data
+
+    self._stats = Stats(proc_idx, conf.stat_interval)
+    self._frag_factory = FragFactory()
+    self._hidden_cache = HiddenCache(conf.hidden_cache_size)
+    self._seed_cache = SeedCache(conf.seed_cache_mb << 20)
+
+    self.assign_device(proc_idx)
+    update_harness(self._harness)
+    if shared is None:
+      if probes is None:
+        probes = load_probes(conf.eng_path, conf.builtin_dir)
+      update_builtins(probes)
+
+  def append_frag(self, cand_idx, hole, stack):
+    hole = self.expand_ast(cand_idx, hole, stack)
+    frag = [cand_idx]
+    return frag, hole
+
+  def assign_device(self, proc_idx):
+    if self._device.startswith('cuda'):
+      gpu_idx = proc_idx % self._num_gpu
+      os.environ['CUDA_VISIBLE_DEVICES'] = '%d' % gpu_idx
+    set_device(self._device)
+    # Keep the workers from oversubscribing the cores
+    torch.set_num_threads(self._num_threads)
+
+  def build_insert(self, trace, nodes, idx, layout):
+    # The subtree generated at idx is resolved from its nearest
+    # ancestor that the seed resolves, e.g., a call for its callee
+    _, parents, _, _, _, ends, _ = layout
+    envs, seed_nodes, decl_pos, _, harness_list = trace
+    pos = idx
+    while pos not in envs:
+      pos = parents[pos]
+      if pos == -1:
+        return None
+    env = envs[pos]
+    parent = nodes[env[5]] if env[5] != -1 else None
+
+    # Declarations of the seed in the subtree are hoisted again
+    removed = set()
+    start = bisect_left(decl_pos, pos)
+    if start < len(decl_pos) and decl_pos[start] < ends[pos]:
+      removed = set(id(node) for node in seed_nodes[pos:ends[pos]])
+    # None stands for the generated subtree itself
+    node = nodes[pos] if pos != idx else None
+    return node, parent, env, removed, harness_list
+
+  def build_layout(self, seed_name, frag_seq):
+    # Constructor, parent position, property, list index and hole
+    # type of each fragment in pre-order, the end of its subtree and
+    # the trace of the seed for the incremental resolution
+    ctors = [self._frag_factory.get(self._frag_list[frag_idx])
+             for frag_idx in frag_seq]
+    layout = (ctors, array('i', [-1]), [None], array('i', [-1]),
+              [None], array('i', [0] * len(frag_seq)))
+    self.layout_subtree(0, frag_seq, layout)
+
+    trace = None
+    if self._resolve_mode == 'incremental':
+      trace = self.trace_seed(seed_name, layout)
+    return layout + (trace,)
 
   def build_seed_tree(self, seed_name, frag_seq):
     max_idx = len(frag_seq) - 1
     idx = random.randint(2, max_idx)
-
-    # Find subtree to be pruned
-    pre_seq = frag_seq[:idx]
-    pruned_seq = frag_seq[idx:]
-    root, post_seq = self.build_subtree(pruned_seq)
-
-    # Build the seed tree
-    frags = pre_seq + [-1] + post_seq
-    stack = []
-    root, _ = self.build_subtree(frags, stack)
-    parent_idx, frag_type = stack.pop(0)
+    layout = self.get_layout(seed_name, frag_seq)
+    ctors, parents, keys, list_idxs, types, ends, trace = layout
+
+    # Link fresh copies of the fragments, except for the
+    # subtree at idx, which is left as a hole
+    nodes = [ctor() for ctor in ctors]
+    self.link_nodes(nodes, layout,
+                    chain(range(1, idx), range(ends[idx], len(nodes))))
+    root = nodes[0]
+
+    parent_pos = parents[idx]
+    if list_idxs[idx] == -1:
+      parent, slot = nodes[parent_pos], keys[idx]
+    else:
+      parent, slot = nodes[parent_pos][keys[idx]], list_idxs[idx]
 
     # Get OoV version of frags
-    pre_seq, _ = self._new_seed_dict[seed_name]
-    pre_seq = pre_seq[:idx]
-    return root, pre_seq, parent_idx, frag_type
-
-  def build_subtree(self, frag_seq, stack=None):
-    frag_idx = frag_seq.pop(0)
-    root = self.idx2frag(frag_idx)
-    self.traverse(root, frag_seq, stack)
-    return root, frag_seq
-
-  def exec_eng(self, js_path):
-    cmd = [self._eng_path] + self._opt + [js_path]
-    proc = Popen(cmd, cwd = self._seed_dir,
-                 stdout = PIPE, stderr = PIPE)
-    timer = threading.Timer(self._timeout, kill_proc, [proc])
-    timer.start()
-    stdout, stderr = proc.communicate()
-    timer.cancel()
-    if proc.returncode in [-4, -11]:
+    new_seq, _ = self._new_seed_dict[seed_name]
+    hole = (new_seq[parent_pos], types[idx], parent, slot)
+    pre_seq = new_seq[:idx]
+
+    insert = None
+    if trace != None:
+      # The seed keeps the identifiers it was resolved with
+      for pos, name in trace[3]:
+        nodes[pos]['name'] = name
+      insert = self.build_insert(trace, nodes, idx, layout)
+    return root, pre_seq, hole, insert
+
+  def build_type_idx(self, device):
+    # Fragment (and OoV) indices of each node type
+    type_idx = {}
+    for frag_idx, frag_type in enumerate(self._new_frag_types):
+      if frag_type not in type_idx:
+        type_idx[frag_type] = []
+      type_idx[frag_type] += [frag_idx]
+
+    for frag_type, idx_list in type_idx.items():
+      type_idx[frag_type] = torch.tensor(idx_list,
+                                         dtype=torch.long,
+                                         device=device)
+    return type_idx
+
+  def close(self):
+    # Removes the scratch files of the engines
+    for engine in self._engines:
+      engine.close()
+
+  def exec_eng(self, js_code):
+    engine = self.get_engine()
+    returncode = engine.run(js_code)
+    if self._launch_time is not None:
+      self.report_launch()
+    if engine.timed_out:
+      self._stats.inc('timeout')
+    if returncode in [-4, -11]:
+      # Only crashing JS files are kept
+      js_name = hash_val(js_code) + '.js'
+      js_path = os.path.join(self._bug_dir, js_name)
+      write(js_path, js_code)
+
       log = [self._eng_path] + self._opt
-      log += [js_path, str(proc.returncode)]
+      log += [js_path, str(returncode)]
       log = str.encode(','.join(log) + '\n')
       self._crash_log.write(log)
       msg = 'Found a bug (%s)' % js_path
       print_msg(msg, 'INFO')
     else:
-      os.remove(js_path)
+      self._ring.add(js_code)
+
+  def expand_ast(self, cand_idx, hole, stack):
+    frag = self._new_frag_list[cand_idx]
 
-  def expand_ast(self, frag, stack, root):
     # Out-of-vocabulary
     if type(frag) == str:
       frag_type = frag
-      frag = random.choice(self._oov_pool[frag_type])
+      oov_idx = random.randrange(len(self._oov_pool[frag_type]))
+      frag = self._oov_pool[frag_type][oov_idx]
 
-    frag = deepcopy(frag)
-    self.build_ast(root, stack, frag)
+    holes = self._frag_factory.holes(frag)
+    frag = self._frag_factory.new(frag)
+    _, _, parent, key = hole
+    parent[key] = frag
+    self.push(stack, frag, cand_idx, holes)
 
     if len(stack) == 0:
-      return None, None
-    else:
-      parent_idx, frag_type = stack.pop()
-      return parent_idx, frag_type
-
-  def frag2idx(self, frag):
-    node_type = get_node_type(frag)
-    hash_val = hash_frag(frag)
-    if hash_val in self._new_frag_dict:
-      return self._new_frag_dict[hash_val]
+      return None
     else:
-      return self._new_frag_dict[node_type]
+      return stack.pop()
+
+  def find_checkpoint(self, checkpoints, pos, exhausted):
+    # A subtree that cannot be closed is started over from its root,
+    # with the hidden state of the seed kept
+    if exhausted:
+      return 0
+    # Otherwise, the choice that pushed the hole at pos is revisited
+    idx = len(checkpoints) - 1
+    while idx > 0 and len(checkpoints[idx][1]) > pos:
+      idx -= 1
+    return idx
 
   def fuzz(self):
-    model = load_model(self._model_path)
+    model = self.init_model()
+    printer = get_printer(self._printer)
 
-    printer = CodePrinter(self._bug_dir)
+    # A terminated worker exits through the finally clause
+    signal.signal(signal.SIGTERM, exit_worker)
+    try:
+      if self._exec_threads > 0:
+        self.fuzz_pipeline(printer, model)
+      else:
+        self.fuzz_serial(printer, model)
+    finally:
+      self.close()
+
+  def fuzz_pipeline(self, printer, model):
+    js_queue = queue.Queue(self._exec_queue_size)
+    for _ in range(self._exec_threads):
+      executor = threading.Thread(target=self.run_executor,
+                                  args=(js_queue,))
+      executor.daemon = True
+      executor.start()
+
+    while True:
+      self._stats.report()
+      js_code = self.gen_js(printer, model)
+      if js_code == None: continue
+
+      # Block the generator while the executors are behind
+      self._stats.observe('queue_depth', js_queue.qsize())
+      if js_queue.full():
+        self._stats.inc('queue_full')
+      js_queue.put(js_code)
 
+  def fuzz_serial(self, printer, model):
     while True:
-      js_path = self.gen_code(printer, model)
-      if js_path == None: continue
-      js_path = os.path.abspath(js_path)
-      self.exec_eng(js_path)
+      self._stats.report()
+      js_code = self.gen_js(printer, model)
+      if js_code == None: continue
+      self.exec_eng(js_code)
+      self._stats.inc('exec')
 
   def gen_code(self, printer, model):
     stack = []
     ins_cnt = 0
-    (seed_name,
-     root, model_input) = self.prepare_seed(model)
-    frag, hidden, parent_idx, frag_type = model_input
-
-    while parent_idx != None:
+    (seed_name, root,
+     model_input, insert) = self.prepare_seed(model)
+    frag, hidden, hole = model_input
+    _, _, ins_parent, ins_slot = hole
+
+    # Each choice can be revisited with the candidates left
+    checkpoints = []
+    backtracks = 0
+    while hole != None:
+      cand_idx = None
+      parent_idx, valid_type, _, _ = hole
       # Check max insertion condition
-      if ins_cnt >= self._max_ins:
-        return None
-      else:
+      if ins_cnt < self._max_ins:
         ins_cnt += 1
-
-      frag = data2tensor(frag)
-      valid_type = frag_type
-      parent_idx, frag_type = self.info2tensor(parent_idx,
-                                               frag_type)
-      outputs, hidden = model.run(frag, hidden,
-                                  parent_idx, frag_type)
-
-      _, cand_tensor = torch.topk(outputs[0][0],
-                                  self._top_k)
-      cand_list = cand_tensor.data.tolist()
-
-      (found,
-       frag,
-       parent_idx, frag_type) = self.append_frag(cand_list,
-                                                 valid_type,
-                                                 root,
-                                                 stack)
-      if not found:
-        msg = 'Failed to select valid frag at %d' % ins_cnt
-        print_msg(msg, 'WARN')
-        return None
-
-    harness_list = self._harness.get_list(seed_name)
-    self.resolve_errors(root, harness_list)
+        frag = data2tensor(frag)
+        parent_idx, frag_type = self.info2tensor(parent_idx,
+                                                 valid_type)
+        outputs, hidden = model.run(frag, hidden,
+                                    parent_idx, frag_type)
+        scores = self.rank_frags(outputs, valid_type)
+        cand_idx = self.select_frag(scores, valid_type)
+        tried = set()
+        if cand_idx is None:
+          msg = 'Failed to select valid frag at %d' % ins_cnt
+          print_msg(msg, 'WARN')
+      elif valid_type in self._closers:
+        # The holes left are closed without the model
+        cand_idx = self._closers[valid_type]
+        frag, hole = self.append_frag(cand_idx, hole, stack)
+        continue
+
+      while cand_idx is None:
+        if (backtracks >= self._max_backtracks or
+            len(checkpoints) == 0):
+          return None
+        backtracks += 1
+        self._stats.inc('backtrack')
+        idx = self.find_checkpoint(checkpoints, len(stack),
+                                   ins_cnt >= self._max_ins)
+        (hole, stack, scores, hidden,
+         ins_cnt, tried) = checkpoints[idx]
+        del checkpoints[idx:]
+        _, valid_type, _, _ = hole
+        cand_idx = self.select_frag(scores, valid_type, tried)
+
+      tried.add(cand_idx)
+      checkpoints.append((hole, list(stack), scores, hidden,
+                          ins_cnt, tried))
+      frag, hole = self.append_frag(cand_idx, hole, stack)
+
+    if insert == None:
+      harness_list = self._harness.get_list(seed_name)
+    else:
+      # Including the files the seed was resolved with
+      node, parent, env, removed, harness_list = insert
+      if node == None:
+        node = ins_parent[ins_slot]
+      insert = node, parent, env, removed
+      harness_list = list(harness_list)
+    resolved = self.resolve_errors(root, harness_list, insert)
 
     root = self.postprocess(root, harness_list)
-    js_path = printer.ast2code(root)
-    return js_path
+    js_code = printer.ast2code(root)
+    if js_code is None:
+      return None
+    if not resolved:
+      self._overrun_ring.add(str.encode(js_code))
+      if self._resolve_overrun == 'drop':
+        return None
+    return js_code
+
+  def gen_js(self, printer, model):
+    with torch.no_grad():
+      js_code = self.gen_code(printer, model)
+    if js_code == None:
+      self._stats.inc('gen_fail')
+      return None
+    return str.encode(js_code)
+
+  def get_engine(self):
+    # Each executor thread owns its engine
+    if not hasattr(self._local, 'engine'):
+      self._local.engine = get_engine(self._exec_mode,
+                                      self._eng_path, self._opt,
+                                      self._seed_dir, self._timeout,
+                                      self._scratch)
+      self._engines.append(self._local.engine)
+    return self._local.engine
+
+  def get_layout(self, seed_name, frag_seq):
+    layout = self._seed_cache.get(seed_name)
+    if layout is None:
+      self._stats.inc('seed_miss')
+      layout = self.build_layout(seed_name, frag_seq)
+      self._seed_cache.insert(seed_name, layout)
+    else:
+      self._stats.inc('seed_hit')
 
-  def idx2frag(self, frag_idx):
-    frag = self._frag_list[frag_idx]
-    frag = deepcopy(frag)
-    return frag
+    num_seeds, num_bytes = self._seed_cache.memory()
+    self._stats.set('seed_cached', num_seeds)
+    self._stats.set('seed_kb', num_bytes >> 10)
+    return layout
 
   def info2tensor(self, parent_idx, frag_type):
     parent_idx = [parent_idx]
@@ -251,6 +443,41 @@ class Fuzzer:
                             tensor_type="Float")
     return parent_idx, frag_type
 
+  def init_model(self):
+    if self._infer_server:
+      model = get_client(self._proc_idx)
+      device = 'cpu'
+    elif self._model is not None:
+      # CUDA is initialized only after the fork
+      model = self._model.to(self._device)
+      device = self._device
+    else:
+      model = load_model(self._model_path, self._device)
+      device = self._device
+    self._type_idx = self.build_type_idx(device)
+    return model
+
+  def layout_subtree(self, pos, frag_seq, layout):
+    _, parents, keys, list_idxs, types, ends = layout
+    frag = self._frag_list[frag_seq[pos]]
+    for key, idx, node_type in self._frag_factory.holes(frag):
+      child_pos = len(parents)
+      parents.append(pos)
+      keys.append(key)
+      list_idxs.append(-1 if idx == None else idx)
+      types.append(node_type)
+      self.layout_subtree(child_pos, frag_seq, layout)
+    ends[pos] = len(parents)
+
+  def link_nodes(self, nodes, layout, positions):
+    _, parents, keys, list_idxs = layout[:4]
+    for pos in positions:
+      node = nodes[parents[pos]]
+      if list_idxs[pos] == -1:
+        node[keys[pos]] = nodes[pos]
+      else:
+        node[keys[pos]][list_idxs[pos]] = nodes[pos]
+
   def postprocess(self, root, harness_list):
     # Insert Load
     body = [get_define_node(self._seed_dir)]
@@ -271,46 +498,84 @@ class Fuzzer:
   def prepare_seed(self, model):
     # Prepare AST
     seed_name, frag_seq = self.select_seed()
-    (root,
-     pre_seq,
-     parent_idx,
-     frag_type) = self.build_seed_tree(seed_name, frag_seq)
+    (root, pre_seq,
+     hole, insert) = self.build_seed_tree(seed_name, frag_seq)
 
     # Prepare input for the model
     frag = [pre_seq[-1]]
     pre_seq = pre_seq[:-1]
-    model_input = data2tensor(pre_seq)
-    hidden = model.run(model_input)
-    model_input = (frag, hidden, parent_idx, frag_type)
+    hidden = self.warm_up(model, pre_seq)
+    model_input = (frag, hidden, hole)
     seed_name = trim_seed_name(seed_name)
-    return seed_name, root, model_input
-
-  def push(self, stack, node):
-    parent_idx = self.frag2idx(node)
-    node_type = get_node_type(node)
-    for key in reversed(PROP_DICT[node_type]):
-      if key not in node: continue
-      child = node[key]
-
-      if (type(child) == dict and
-          is_pruned(child)):
-        info = (parent_idx, get_node_type(child))
-        stack.append(info)
-      elif type(child) == list:
-        for _child in reversed(child):
-          if _child != None and is_pruned(_child):
-            info = (parent_idx, get_node_type(_child))
-            stack.append(info)
-
-  def resolve_errors(self, root, harness_list):
+    return seed_name, root, model_input, insert
+
+  def push(self, stack, node, parent_idx, holes):
+    for key, idx, node_type in reversed(holes):
+      if idx == None:
+        hole = (parent_idx, node_type, node, key)
+      else:
+        hole = (parent_idx, node_type, node[key], idx)
+      stack.append(hole)
+
+  def rank_frags(self, outputs, valid_type):
+    # Scores of the fragments of the valid type
+    if valid_type not in self._type_idx:
+      return None
+    type_idx = self._type_idx[valid_type]
+    return outputs[0][0].index_select(0, type_idx)
+
+  def report_launch(self):
+    elapsed = time.time() - self._launch_time
+    self._launch_time = None
+    msg = '[proc.%d] First execution %.2fs after launch'
+    print_msg(msg % (self._proc_idx, elapsed), 'INFO')
+
+  def resolve_errors(self, root, harness_list, insert=None):
+    # Returns False if the resolution ran out of budget
+    set_budget(Budget(self._resolve_max_visits,
+                      self._resolve_max_time))
     try:
-      # ID Resolve
-      symbols = hoisting(root, ([],[]), True)
-      resolve_id(root, None, symbols, True,
-                 cand=[], hlist=harness_list)
+      if insert == None:
+        # ID Resolve
+        symbols = hoisting(root, init_symbols(), True)
+        resolve_id(root, None, symbols, True,
+                   cand=[], hlist=harness_list)
+      else:
+        node, parent, env, removed = insert
+        resolve_subtree(node, parent, env, removed, harness_list)
     except ResolveBug as error:
       msg = 'Resolve Failed: {}'.format(error)
       print_msg(msg, 'WARN')
+    except (ResolveOverrun, RecursionError):
+      self._stats.inc('resolve_overrun')
+      return False
+    finally:
+      set_budget(None)
+    return True
+
+  def run_executor(self, js_queue):
+    while True:
+      js_code = js_queue.get()
+      self.exec_eng(js_code)
+      self._stats.inc('exec')
+
+  def select_frag(self, scores, valid_type, tried=None):
+    if scores is None:
+      return None
+
+    # Only fragments of the valid type are candidates, and a retry
+    # widens k until an untried candidate is left
+    type_idx = self._type_idx[valid_type]
+    top_k, cand_list = 0, []
+    while len(cand_list) == 0 and top_k < len(type_idx):
+      top_k = min(top_k + self._top_k, len(type_idx))
+      _, cand_tensor = torch.topk(scores, top_k)
+      cand_list = type_idx[cand_tensor].tolist()
+      if tried:
+        cand_list = [idx for idx in cand_list if idx not in tried]
+    if len(cand_list) == 0:
+      return None
+    return random.choice(cand_list)
 
   def select_seed(self):
     seed_list = list(self._seed_dict.keys())
@@ -321,74 +586,154 @@ class Fuzzer:
       frag_len = len(frag_seq)
     return seed_name, frag_seq
 
-  def traverse(self, node, frag_seq, stack):
-    node_type = get_node_type(node)
-    if node_type not in TERM_TYPE:
-      parent_idx = self.frag2idx(node)
+  def trace_seed(self, seed_name, layout):
+    # Resolve the whole seed once, recording the environment of
+    # each fragment
+    nodes = [ctor() for ctor in layout[0]]
+    self.link_nodes(nodes, layout, range(1, len(nodes)))
+    harness_list = self._harness.get_list(trim_seed_name(seed_name))
+    # The seed is resolved in full if it can not be traced
+    set_budget(Budget(self._resolve_max_visits,
+                      self._resolve_max_time))
+    try:
+      envs = trace_envs(nodes, harness_list)
+    finally:
+      set_budget(None)
+    if envs == None: return None
+    decl_pos = array('i', [pos for pos, node in enumerate(nodes)
+                           if get_node_type(node) in
+                           ['VariableDeclarator', 'FunctionDeclaration']])
+    renames = [(pos, node['name']) for pos, node in enumerate(nodes)
+               if get_node_type(node) == 'Identifier' and
+               node['name'] != layout[0][pos]()['name']]
+    return envs, nodes, decl_pos, renames, harness_list
+
+  def warm_up(self, model, pre_seq):
+    # Resume from the deepest cached prefix
+    depth, hidden = self._hidden_cache.lookup(pre_seq)
+    if hidden is None:
+      self._stats.inc('hidden_miss')
     else:
-      return
-
-    for key in PROP_DICT[node_type]:
-      if key not in node: continue
-      child = node[key]
-
-      # If it has a single child
-      if is_single_node(child):
-        if is_pruned(child):
-          frag_idx = frag_seq.pop(0)
-          if frag_idx == -1:
-            if stack != None:
-              frag_info = (parent_idx,
-                           get_node_type(child))
-              stack.append(frag_info)
-            continue
-          frag = self.idx2frag(frag_idx)
-          node[key] = frag
-        self.traverse(node[key], frag_seq, stack)
-      # If it has multiple children
-      elif is_node_list(child):
-        for idx, _child in enumerate(child):
-          if _child == None:
-            continue
-          elif is_pruned(_child):
-            frag_idx = frag_seq.pop(0)
-            if frag_idx == -1:
-              if stack != None:
-                frag_info = (parent_idx,
-                             get_node_type(_child))
-                stack.append(frag_info)
-              continue
-            frag = self.idx2frag(frag_idx)
-            child[idx] = frag
-          self.traverse(child[idx], frag_seq, stack)
+      self._stats.inc('hidden_hit')
+    self._stats.observe('hidden_reuse', depth / len(pre_seq))
+
+    if depth < len(pre_seq):
+      model_input = data2tensor(pre_seq[depth:])
+      hidden = model.warm(model_input, hidden)
+      self._hidden_cache.insert(pre_seq, hidden)
+
+    num_nodes, num_bytes = self._hidden_cache.memory()
+    self._stats.set('hidden_nodes', num_nodes)
+    self._stats.set('hidden_kb', num_bytes >> 10)
+    return hidden
+
+def exit_worker(signum, frame):
+  sys.exit(0)
+
+def fork_workers(conf, launch_time, server):
+  # The zygote loads the read-only state once, and the workers
+  # share its pages copy-on-write
+  shared = preload(conf)
+  if torch.cuda.is_initialized():
+    msg = 'CUDA must not be initialized before forking the workers'
+    print_msg(msg, 'ERROR')
+    raise RuntimeError(msg)
+
+  ctx = get_context('fork')
+  workers = []
+  for proc_idx in range(conf.num_proc):
+    worker = ctx.Process(target=run_forked,
+                         args=(proc_idx, conf, shared,
+                               launch_time, server))
+    worker.start()
+    workers += [worker]
+
+  try:
+    for worker in workers:
+      worker.join()
+  except KeyboardInterrupt:
+    print_msg('Terminating workers ...', 'INFO')
+    for worker in workers:
+      worker.terminate()
+    for worker in workers:
+      worker.join()
+    print_msg('Killed processes', 'INFO')
+    os.killpg(os.getpid(), signal.SIGKILL)
 
 def fuzz(conf):
+  launch_time = time.time()
   set_start_method('spawn')
-  p = Pool(conf.num_proc, init_worker)
-  pool_map(p, run, range(conf.num_proc), conf=conf)
+  if conf.infer_server:
+    server = start_server(conf)
+  else:
+    server = None
 
-def is_pruned(node):
-  keys = node.keys()
-  return (len(keys) == 1 and
-          'type' in keys and
-          get_node_type(node) not in TERM_TYPE)
+  if conf.start_mode == 'zygote':
+    fork_workers(conf, launch_time, server)
+    return
 
-def load_data(conf):
-  data_path = os.path.join(conf.data_dir,
-                           'data.p')
-  seed_data_path = os.path.join(conf.data_dir,
-                                'seed.p')
+  # Probe the engine once, and pass the results to the workers
+  probes = load_probes(conf.eng_path, conf.builtin_dir)
+
+  if server is not None:
+    p = Pool(conf.num_proc, init_client, server)
+  else:
+    p = Pool(conf.num_proc, init_worker)
+  pool_map(p, run, range(conf.num_proc),
+           conf=conf, launch_time=launch_time, probes=probes)
 
-  seed = load_pickle(seed_data_path)
-  data = load_pickle(data_path)
+def load_data(conf):
+  # Workers share the pages of the dataset files, and training
+  # sequences are never loaded
+  dataset = Dataset(conf.data_dir)
+  seed = (dataset.seed_dict(), dataset.frag_list(),
+          dataset.new_seed_dict())
+  data = (dataset.new_frag_list(), dataset.new_frag_types(),
+          dataset.oov_pool(), dataset.type_dict(),
+          dataset.closers())
   return seed, data
 
-def load_model(model_path):
-  model = torch.load(model_path)
-  model.cuda()
+def load_model(model_path, device):
+  model = torch.load(model_path, map_location=device)
+  model.to(device)
   model.eval()
   return model
 
-def run(proc_idx, conf):
-  fuzzer = Fuzzer(proc_idx, conf)
+def preload(conf):
+  seed, data = load_data(conf)
+  harness = HarnessIndex(conf.harness_path)
+  update_builtins(load_probes(conf.eng_path, conf.builtin_dir))
+
+  # The model stays on the CPU until a worker moves it
+  if conf.infer_server:
+    model = None
+  else:
+    model = load_model(conf.model_path, 'cpu')
+  return (seed, data), harness, model
+
+def run(proc_idx, conf, launch_time, probes):
+  fuzzer = Fuzzer(proc_idx, conf, launch_time=launch_time,
+                  probes=probes)
+  fuzzer.fuzz()
+
+def run_forked(proc_idx, conf, shared, launch_time, server):
+  if server is not None:
+    init_client(*server)
+  else:
+    init_worker()
+
+  # Forked workers would otherwise share the RNG states
+  random.seed()
+  torch.seed()
+
+  fuzzer = Fuzzer(proc_idx, conf, shared, launch_time)
   fuzzer.fuzz()
+
+def start_server(conf):
+  req_queue = Queue()
+  res_queues = [Queue() for _ in range(conf.num_proc)]
+  server = Process(target=serve,
+                   args=(conf, req_queue, res_queues))
+  server.daemon = True
+  server.start()
+  return req_queue, res_queues
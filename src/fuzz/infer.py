@@ -0,0 +1,155 @@
+import queue
+import time
+
+import torch
+
+from utils import data2tensor
+from utils import init_worker
+from utils import set_device
+from utils.logger import print_msg
+
+REPORT_INTERVAL = 10000
+
+_req_queue = None
+_res_queues = None
+
+class InferenceClient:
+  def __init__(self, proc_idx, req_queue, res_queue):
+    self._proc_idx = proc_idx
+    self._req_queue = req_queue
+    self._res_queue = res_queue
+
+  def request(self, req):
+    self._req_queue.put(req)
+    return self._res_queue.get()
+
+  def run(self, inputs, hidden=None, parent_idx=None, frag_type=None):
+    if hidden is None:
+      return self.warm(inputs)
+
+    # Predict the next fragment
+    inputs = inputs.tolist()
+    req = ('step', self._proc_idx, inputs,
+           hidden2numpy(hidden),
+           parent_idx.tolist(), frag_type.tolist())
+    outputs, hidden = self.request(req)
+    outputs = torch.from_numpy(outputs)
+    return outputs, tensor2hidden(hidden)
+
+  def warm(self, inputs, hidden=None):
+    # Warm up the hidden state with a prefix
+    if hidden is not None:
+      hidden = hidden2numpy(hidden)
+    req = ('warm', self._proc_idx, inputs.tolist(), hidden)
+    hidden = self.request(req)
+    return tensor2hidden(hidden)
+
+class InferenceServer:
+  def __init__(self, conf, req_queue, res_queues):
+    self._max_batch = conf.infer_batch_size
+    self._device = conf.device
+    self._max_wait = conf.infer_max_wait
+    self._model_path = conf.model_path
+    self._req_queue = req_queue
+    self._res_queues = res_queues
+
+    self._num_batch = 0
+    self._num_step = 0
+
+  def collect(self):
+    batch = [self._req_queue.get()]
+    deadline = time.time() + self._max_wait
+    while len(batch) < self._max_batch:
+      remaining = deadline - time.time()
+      if remaining <= 0:
+        break
+      try:
+        batch += [self._req_queue.get(timeout=remaining)]
+      except queue.Empty:
+        break
+    return batch
+
+  def report(self):
+    avg_size = self._num_step / self._num_batch
+    msg = 'Inference: %d batches, avg batch size = %.2f'
+    msg = msg % (self._num_batch, avg_size)
+    print_msg(msg, 'INFO')
+
+  def run_step(self, model, reqs):
+    frags, parents, types = [], [], []
+    hs, cs = [], []
+    for _, _, frag, (h, c), parent_idx, frag_type in reqs:
+      frags += frag
+      parents += parent_idx
+      types += frag_type
+      hs += [torch.from_numpy(h)]
+      cs += [torch.from_numpy(c)]
+
+    frags = data2tensor(frags)
+    parents = data2tensor(parents)
+    types = data2tensor(types, tensor_type='Float')
+    device = frags.device
+    hidden = (torch.cat(hs, dim=1).to(device),
+              torch.cat(cs, dim=1).to(device))
+
+    outputs, (h, c) = model.step(frags, hidden, parents, types)
+    outputs = outputs.cpu().numpy()
+    h = h.cpu().numpy()
+    c = c.cpu().numpy()
+
+    for idx, req in enumerate(reqs):
+      proc_idx = req[1]
+      res = (outputs[:, idx:idx + 1],
+             (h[:, idx:idx + 1], c[:, idx:idx + 1]))
+      self._res_queues[proc_idx].put(res)
+
+    self._num_batch += 1
+    self._num_step += len(reqs)
+    if self._num_batch % REPORT_INTERVAL == 0:
+      self.report()
+
+  def run_warm(self, model, req):
+    _, proc_idx, pre_seq, hidden = req
+    if hidden is not None:
+      hidden = tuple(data2tensor(x, tensor_type='Float')
+                     for x in hidden)
+    hidden = model.warm(data2tensor(pre_seq), hidden)
+    self._res_queues[proc_idx].put(hidden2numpy(hidden))
+
+  def serve(self):
+    from fuzz.fuzz import load_model
+    model = load_model(self._model_path, self._device)
+
+    with torch.no_grad():
+      while True:
+        batch = self.collect()
+        steps = []
+        for req in batch:
+          if req[0] == 'warm':
+            self.run_warm(model, req)
+          else:
+            steps += [req]
+        if len(steps) > 0:
+          self.run_step(model, steps)
+
+def get_client(proc_idx):
+  return InferenceClient(proc_idx, _req_queue,
+                         _res_queues[proc_idx])
+
+def hidden2numpy(hidden):
+  return tuple(x.detach().cpu().numpy() for x in hidden)
+
+def init_client(req_queue, res_queues):
+  global _req_queue, _res_queues
+  _req_queue = req_queue
+  _res_queues = res_queues
+  init_worker()
+
+def serve(conf, req_queue, res_queues):
+  init_worker()
+  set_device(conf.device)
+  server = InferenceServer(conf, req_queue, res_queues)
+  server.serve()
+
+def tensor2hidden(hidden):
+  return tuple(torch.from_numpy(x) for x in hidden)
@@ -1,10 +1,13 @@
 import random
+import time
 
 from fuzz.builtin import BuiltIn
-from fuzz.id_map import ID_HARNESS_MAP
+from fuzz.resolve_bug import ResolveBug
+from fuzz.resolve_bug import ResolveOverrun
 from fuzz.resolve_bug import error
 from fuzz.symbol import JSType
 from fuzz.symbol import Symbol
+from fuzz.symbol import SymbolList
 from utils import get_node_type
 from utils import is_single_node
 from utils import is_node_list
@@ -12,13 +15,47 @@ from utils.node import PROP_DICT
 from utils.node import TERM_TYPE
 
 builtin = BuiltIn()
+harness = None
+# Fragment positions and environments of the seed being traced
+tracer = None
+# Budget of the program being resolved
+budget = None
+
+class Budget:
+  # The wall time is checked once in a number of visits
+  CHECK_INTERVAL = 256
+
+  def __init__(self, max_visits, max_time):
+    self.max_visits = max_visits
+    self.visits = 0
+    if max_time > 0:
+      self.deadline = time.time() + max_time
+    else:
+      self.deadline = None
+
+  def charge(self):
+    self.visits += 1
+    if self.max_visits > 0 and self.visits > self.max_visits:
+      raise ResolveOverrun('%d node visits' % self.max_visits)
+    if (self.deadline != None and
+        self.visits % self.CHECK_INTERVAL == 0 and
+        time.time() > self.deadline):
+      raise ResolveOverrun('%d node visits in time' % self.visits)
+
+def update_builtins(probes):
+  builtin.update_builtins(probes)
+  builtin.build_resolve_pattern(probes)
+
+def set_budget(new_budget):
+  global budget
+  budget = new_budget
 
-def update_builtins(eng_path):
-  builtin.update_builtins(eng_path)
-  builtin.build_resolve_pattern(eng_path)
+def update_harness(harness_index):
+  global harness
+  harness = harness_index
 
 def init_symbols():
-  return [], []
+  return SymbolList(), SymbolList()
 
 def hoisting(node, symbols, is_global):
   global_var, local_var = symbols
@@ -30,6 +67,13 @@ def hoisting(node, symbols, is_global):
   func_hoisting(node, sym_list)
   return global_var, local_var
 
+def subtree_hoisting(node, parent, sym_list):
+  var_hoisting(node, parent, sym_list)
+  if get_node_type(node) == 'FunctionDeclaration':
+    sym_list.append(Symbol(node['id'], node, JSType.js_func))
+  elif get_node_type(node) == 'BlockStatement':
+    func_hoisting(node, sym_list)
+
 def pattern_hoisting(pattern, node):
   if pattern == None: return []
   pattern_type = get_node_type(pattern)
@@ -65,7 +109,7 @@ def var_hoisting(node, parent, sym_list):
         parent['kind'] == 'var' and
         node_type == 'VariableDeclarator'):
     symbols = pattern_hoisting(node['id'], node)
-    sym_list += symbols
+    sym_list.extend(symbols)
   else:
     for key in PROP_DICT[node_type]:
       if key not in node: continue
@@ -102,6 +146,10 @@ def func_hoisting(node, sym_list):
 def resolve_id(node, parent, symbols,
                is_global, is_check=False, cand=[], hlist=[]):
   if node == None: return symbols
+  if budget != None:
+    budget.charge()
+  if tracer != None:
+    save_env(node, parent, symbols, is_global, is_check, cand)
 
   node_type = get_node_type(node)
   if node_type == 'Identifier':
@@ -174,9 +222,9 @@ def resolve_identifier(node, parent, symbols,
                        is_global, is_check, cand, hlist):
   name = node['name']
   if name in builtin.BUILTINS: return symbols
-  if name in ID_HARNESS_MAP:
+  if harness.has_id(name):
     if not is_duplicate(hlist, name):
-      fname = pick_one(ID_HARNESS_MAP[name])
+      fname = pick_one(harness.get_files(name))
       hlist.append(fname)
     return symbols
   if find_symbol(node, symbols) == None:
@@ -205,9 +253,9 @@ def resolve_FuncCall(node, parent, symbols,
         name in builtin.OBJS or
         name in builtin.ARRAYS):
       expr = None
-    elif name in ID_HARNESS_MAP:
+    elif harness.has_id(name):
       if not is_duplicate(hlist, name):
-        fname = pick_one(ID_HARNESS_MAP[name])
+        fname = pick_one(harness.get_files(name))
         hlist.append(fname)
       expr = None
     else:
@@ -238,17 +286,20 @@ def resolve_FuncCall(node, parent, symbols,
                is_global, is_check, cand, hlist)
   if (go_flag and expr != None and
       'params' in expr and 'body' in expr):
-    l1 = []
-    for arg in expr['params']:
-      if get_node_type(arg) == 'Identifier':
-        l1.append(Symbol(arg, arg))
-    l1.append(Symbol('arguments', None, JSType.js_array))
-    symbols = global_var, l1
-    symbols = hoisting(expr['body'], symbols, False)
-    resolve_id(expr['body'], node, symbols,
-               False, False, cand, hlist)
+    resolve_body(expr, node, global_var, cand, hlist)
   return global_var, local_var
 
+def resolve_body(expr, node, global_var, cand, hlist):
+  l1 = SymbolList()
+  for arg in expr['params']:
+    if get_node_type(arg) == 'Identifier':
+      l1.append(Symbol(arg, arg))
+  l1.append(Symbol('arguments', None, JSType.js_array))
+  symbols = global_var, l1
+  symbols = hoisting(expr['body'], symbols, False)
+  resolve_id(expr['body'], node, symbols,
+             False, False, cand, hlist)
+
 def resolve_Assign(node, parent, symbols,
                    is_global, is_check, cand, hlist):
   symbols = resolve_id(node['right'], node, symbols,
@@ -330,16 +381,16 @@ def resolve_If(node, parent, symbols,
   length = len(symbols[1])
   resolve_id(node['test'], node, symbols,
              is_global, is_check, cand, hlist)
-  ret = ([], [])
+  ret = init_symbols()
   following = [node['consequent']]
   if 'alternate' in node:
     following.append(node['alternate'])
   for x in following:
-    g1, l1 = global_var[::], local_var[::]
+    g1, l1 = global_var.copy(), local_var.copy()
     func_hoisting(x, l1)
     g1, l1 = resolve_id(x, node, (g1, l1),
                         is_global, is_check, cand, hlist)
-    ret = merge_symbols(ret, (g1, l1[:length]))
+    ret = merge_symbols(ret, (g1, l1.view(length)))
   return ret
 
 def resolve_While(node, parent, symbols,
@@ -350,7 +401,7 @@ def resolve_While(node, parent, symbols,
   func_hoisting(node['body'], symbols[1])
   symbols = resolve_id(node['body'], node, symbols,
                        is_global, is_check, cand, hlist)
-  return symbols[0], symbols[1][:length]
+  return symbols[0], symbols[1].view(length)
 
 def resolve_For(node, parent, symbols,
                 is_global, is_check, cand, hlist):
@@ -367,7 +418,7 @@ def resolve_For(node, parent, symbols,
                        is_global, is_check, cand, hlist)
   symbols = resolve_id(node['update'], node, symbols,
                        is_global, is_check, cand, hlist)
-  return symbols[0], symbols[1][:length]
+  return symbols[0], symbols[1].view(length)
 
 def resolve_ForIn(node, parent, symbols,
                   is_global, is_check, cand, hlist):
@@ -391,20 +442,93 @@ def resolve_With(node, parent, symbols,
 
 def resolve_Try(node, parent, symbols,
                 is_global, is_check, cand, hlist):
-  global_var, local_var= symbols
-  length = len(local_var)
-  ret = ([], [])
+  # Symbols declared in the blocks do not outlive the statement
+  global_var, local_var = symbols
   for x in [node['block'], node['handler'], node['finalizer']]:
-    g1, l1 = global_var[::], local_var[::]
+    g1, l1 = global_var.copy(), local_var.copy()
     func_hoisting(x, l1)
     if (x != None and x == node['handler'] and
         get_node_type(x['param']) == 'Identifier'):
       l1.append(Symbol(x['param'], None, JSType.js_object))
-    g1, l1 = resolve_id(x, node, (g1,l1),
-                        is_global, is_check, cand, hlist)
-    ret = merge_symbols(ret, (g1,l1[:length]))
+    resolve_id(x, node, (g1, l1),
+               is_global, is_check, cand, hlist)
   return symbols
 
+def save_env(node, parent, symbols, is_global, is_check, cand):
+  # Only the first visit of a fragment is kept, as function bodies
+  # are resolved once
+  node_pos, envs = tracer
+  pos = node_pos.get(id(node))
+  if pos == None or pos in envs: return
+  global_var, local_var = symbols
+  parent_pos = node_pos.get(id(parent), -1)
+  envs[pos] = (global_var, len(global_var), local_var, len(local_var),
+               tuple(cand), parent_pos, is_global, is_check)
+
+def trace_envs(nodes, hlist):
+  # Resolves a seed and records the environment in which each of its
+  # fragments is resolved. The symbols are frozen, since the
+  # environments are shared by the ASTs generated from the seed.
+  # Returns None if the seed is too large or too deep to trace.
+  global tracer
+  node_pos = {id(node): pos for pos, node in enumerate(nodes)}
+  envs = {}
+  tracer = node_pos, envs
+  try:
+    symbols = hoisting(nodes[0], init_symbols(), True)
+    resolve_id(nodes[0], None, symbols, True,
+               cand=[], hlist=hlist)
+  except ResolveBug:
+    # Fragments after the failure are resolved with the whole AST
+    pass
+  except (ResolveOverrun, RecursionError):
+    return None
+  finally:
+    tracer = None
+
+  for global_var, _, local_var, _, cand, _, _, _ in envs.values():
+    global_var.freeze()
+    local_var.freeze()
+    for sym_list in cand:
+      for sym in sym_list:
+        sym.freeze()
+  return envs
+
+def get_env_list(sym_list, length, removed):
+  # Symbols hoisted from the replaced subtree are left out
+  sym_list = sym_list.view(length)
+  if len(removed) == 0:
+    return sym_list
+  syms = sym_list.to_list()
+  if all(id(sym.expr) not in removed for sym in syms):
+    return sym_list
+  sym_list = SymbolList()
+  sym_list.extend(sym for sym in syms if id(sym.expr) not in removed)
+  return sym_list
+
+def resolve_subtree(node, parent, env, removed, hlist):
+  # Resolves a subtree inserted into a seed in the environment of the
+  # fragment it replaces
+  (global_var, global_len, local_var, local_len,
+   cand, _, is_global, is_check) = env
+  symbols = (get_env_list(global_var, global_len, removed),
+             get_env_list(local_var, local_len, removed))
+  sym_list = symbols[0] if is_global else symbols[1]
+  length = len(sym_list)
+  subtree_hoisting(node, parent, sym_list)
+  cand = list(cand)
+  resolve_id(node, parent, symbols,
+             is_global, is_check, cand, hlist)
+
+  # Functions declared by the subtree may be called only by the seed
+  for sym in sym_list.to_list(length):
+    if sym.ty == JSType.js_func and sym.get_flag():
+      sym.set_flag(False)
+      expr = sym.expr
+      if (expr != None and
+          'params' in expr and 'body' in expr):
+        resolve_body(expr, node, symbols[0], cand, hlist)
+
 def infer_id_types(node, parent):
   if get_node_type(parent) == 'MemberExpression':
     if get_node_type(parent['property']) == 'Identifier':
@@ -418,15 +542,19 @@ def find_symbol(identifier, symbols):
   name = identifier['name']
   if name == None: return None
   for sym_list in symbols:
-    for var in sym_list[::-1]:
-      if var.symbol == name: return var
+    var = sym_list.find(name)
+    if var != None: return var
   return None
 
 def find_cand(types, symbols):
   cand = []
   if JSType.unknown in types:
-    return symbols[0] + symbols[1]
+    return list(symbols[0]) + list(symbols[1])
   for sym_list in symbols:
+    if isinstance(sym_list, SymbolList):
+      cand += sym_list.find_types(types)
+      continue
+    # Candidates of for loops and builtins
     for var in sym_list:
       if (var.ty in types or
           var.ty in [JSType.unknown, JSType.undefined]):
@@ -453,17 +581,14 @@ def merge_symbols(s1, s2):
   g2, l2 = s2
   ret = []
   for x,y in [(g1,g2), (l1,l2)]:
-    tmp = []
-    if x == []:
+    if len(x) == 0:
       tmp = y
-    elif y == []:
+    elif len(y) == 0:
       tmp = x
-    elif x == y:
+    elif x.equals(y):
       tmp = x
     else:
-      for a in x:
-        if a not in y:
-          y.append(a)
+      y.merge(x)
       tmp = y
     ret.append(tmp)
   return tuple(ret)
@@ -530,7 +655,8 @@ def get_type(expr, symbols):
   return JSType.unknown
 
 def is_duplicate(hlist, name):
+  file_set = harness.get_file_set(name)
   for fname in hlist:
-    if fname in ID_HARNESS_MAP[name]:
+    if fname in file_set:
       return True
   return False
@@ -0,0 +1,24 @@
+import os
+import threading
+
+from utils import write
+
+class SampleRing:
+  def __init__(self, ring_dir, size):
+    self._ring_dir = ring_dir
+    self._size = size
+    self._idx = 0
+    self._lock = threading.Lock()
+
+    if size > 0 and not os.path.exists(ring_dir):
+      os.makedirs(ring_dir)
+
+  def add(self, js_code):
+    if self._size <= 0:
+      return
+    # Overwrite the oldest sample
+    with self._lock:
+      slot = self._idx
+      self._idx = (self._idx + 1) % self._size
+    js_path = os.path.join(self._ring_dir, '%d.js' % slot)
+    write(js_path, js_code)
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from utils.logger import print_msg
+
+class Stats:
+  def __init__(self, proc_idx, interval):
+    self._proc_idx = proc_idx
+    self._interval = interval
+    self._counters = {}
+    self._lock = threading.Lock()
+    self._samples = {}
+    self._start = time.time()
+    self._last = self._start
+
+  def get(self, key):
+    return self._counters.get(key, 0)
+
+  def inc(self, key, num=1):
+    with self._lock:
+      self._counters[key] = self.get(key) + num
+
+  def observe(self, key, value):
+    with self._lock:
+      total, cnt = self._samples.get(key, (0, 0))
+      self._samples[key] = (total + value, cnt + 1)
+
+  def report(self):
+    now = time.time()
+    if (self._interval <= 0 or
+        now - self._last < self._interval):
+      return
+    self._last = now
+
+    elapsed = now - self._start
+    rate = self.get('exec') / elapsed
+    msg = '[proc.%d] %.2f programs/s' % (self._proc_idx, rate)
+    for key in sorted(self._counters):
+      msg += ', %s = %d' % (key, self._counters[key])
+    for key in sorted(self._samples):
+      total, cnt = self._samples[key]
+      msg += ', avg %s = %.2f' % (key, total / cnt)
+    print_msg(msg, 'INFO')
+
+  def set(self, key, value):
+    with self._lock:
+      self._counters[key] = value
@@ -1,4 +1,7 @@
+from bisect import bisect_left
+from bisect import insort
 from enum import Enum
+from itertools import chain
 
 from fuzz.resolve_bug import error
 
@@ -30,14 +33,28 @@ class Symbol:
       self.ty = ty
     self.expr = expr
     self.flag = True
+    self.frozen = False
+    # (SymbolList, position) of each list holding the symbol
+    self.owners = []
+
+  def freeze(self):
+    # The type and the flag are no longer updated
+    self.flag = False
+    self.frozen = True
+    self.owners = []
 
   def update_type(self, ty):
+    if self.frozen: return
+    if ty != self.ty:
+      for sym_list, pos in self.owners:
+        sym_list.move_type(pos, self.ty, ty)
     self.ty = ty
 
   def get_type(self):
     return self.ty
 
   def set_flag(self, flag):
+    if self.frozen: return
     self.flag = flag
 
   def get_flag(self):
@@ -47,6 +64,156 @@ class Symbol:
     ret = '%s: %s'%(self.symbol, self.ty)
     return ret
 
+class SymbolList:
+  # Symbols in the order of their declarations, indexed by name,
+  # identity and type. A copy shares the symbols of its base up to
+  # the length of the base at the time of the copy, so that branches
+  # are copied in constant time.
+  MAX_DEPTH = 32
+  MIN_BUCKET = 32
+
+  def __init__(self, base=None, base_len=0):
+    self._base = base
+    self._base_len = base_len
+    self._depth = 0 if base == None else base._depth + 1
+    self._frozen = False
+    self._syms = []
+    # Key -> ascending positions of the symbols in this list
+    self._names = {}
+    self._ids = {}
+    self._types = {}
+
+  def __contains__(self, sym):
+    return self.lookup('_ids', id(sym)) != None
+
+  def __iter__(self):
+    return iter(self.to_list())
+
+  def __len__(self):
+    return self._base_len + len(self._syms)
+
+  def append(self, sym):
+    # Positions only grow, so every index stays sorted
+    pos = self._base_len + len(self._syms)
+    self._syms.append(sym)
+    self._names.setdefault(sym.symbol, []).append(pos)
+    self._ids.setdefault(id(sym), []).append(pos)
+    self._types.setdefault(sym.ty, []).append(pos)
+    if not sym.frozen:
+      sym.owners.append((self, pos))
+
+  def copy(self):
+    return self.view(len(self))
+
+  def equals(self, other):
+    # Same symbols in the same order
+    if len(self) != len(other):
+      return False
+    start = self.shared_len(other)
+    return all(x is y for x, y in zip(self.to_list(start),
+                                      other.to_list(start)))
+
+  def extend(self, syms):
+    for sym in syms:
+      self.append(sym)
+
+  def freeze(self):
+    # Lists sharing a base freeze it once
+    sym_list = self
+    while sym_list != None and not sym_list._frozen:
+      for sym in sym_list._syms:
+        sym.freeze()
+      sym_list._frozen = True
+      sym_list = sym_list._base
+
+  def find(self, name):
+    # The last symbol of the name
+    return self.lookup('_names', name)
+
+  def find_types(self, types):
+    # Symbols of the types or of an unknown type, in order
+    types = list(types) + [JSType.unknown, JSType.undefined]
+    cand = []
+    for sym_list, limit in self.get_chain()[::-1]:
+      syms = sym_list._syms[:max(0, limit - sym_list._base_len)]
+      if len(syms) <= self.MIN_BUCKET:
+        # Scanning a few symbols is cheaper than merging buckets
+        cand += [sym for sym in syms if sym.ty in types]
+        continue
+      buckets = [sym_list._types.get(ty, []) for ty in types]
+      positions = sorted(chain.from_iterable(
+        bucket[:bisect_left(bucket, limit)] for bucket in buckets))
+      cand += [sym_list._syms[pos - sym_list._base_len]
+               for pos in positions]
+    return cand
+
+  def get_chain(self):
+    # (list, limit) pairs from this list to the root
+    ret = []
+    sym_list, limit = self, len(self)
+    while sym_list != None:
+      ret.append((sym_list, limit))
+      limit = min(limit, sym_list._base_len)
+      sym_list = sym_list._base
+    return ret
+
+  def lookup(self, index, key):
+    # The last symbol under the key of the index
+    if self._base == None:
+      positions = getattr(self, index).get(key)
+      return self._syms[positions[-1]] if positions else None
+    sym_list, limit = self, len(self)
+    while sym_list != None:
+      positions = getattr(sym_list, index).get(key)
+      if positions:
+        idx = bisect_left(positions, limit)
+        if idx > 0:
+          return sym_list._syms[positions[idx - 1] - sym_list._base_len]
+      limit = min(limit, sym_list._base_len)
+      sym_list = sym_list._base
+    return None
+
+  def merge(self, other):
+    # Append the symbols of other that are not in this list
+    start = self.shared_len(other)
+    for sym in other.to_list(start):
+      if sym not in self:
+        self.append(sym)
+
+  def move_type(self, pos, old_ty, new_ty):
+    self._types[old_ty].remove(pos)
+    insort(self._types.setdefault(new_ty, []), pos)
+
+  def shared_len(self, other):
+    # Length of the prefix that both lists share with a base
+    limits = {id(sym_list): limit
+              for sym_list, limit in self.get_chain()}
+    for sym_list, limit in other.get_chain():
+      if id(sym_list) in limits:
+        return min(limit, limits[id(sym_list)])
+    return 0
+
+  def to_list(self, start=0):
+    if self._base == None:
+      return self._syms[start:]
+    ret = []
+    for sym_list, limit in self.get_chain()[::-1]:
+      if limit <= start: continue
+      begin = max(start, sym_list._base_len) - sym_list._base_len
+      ret += sym_list._syms[begin:limit - sym_list._base_len]
+    return ret
+
+  def view(self, length):
+    # A new list of the first symbols
+    base = self
+    while base._base != None and length <= base._base_len:
+      base = base._base
+    if base._depth < self.MAX_DEPTH:
+      return SymbolList(base, length)
+    sym_list = SymbolList()
+    sym_list.extend(base.to_list()[:length])
+    return sym_list
+
 def to_jstype(expr):
   if expr['type'] == 'VariableDeclarator':
     return JSType.undefined
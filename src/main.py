@@ -1,8 +1,11 @@
 import argparse
 import os
+import subprocess
 import sys
 import torch
 
+from utils import set_device
+from utils import set_hash_mode
 from utils.config import Config
 from utils.logger import print_msg
 
@@ -10,8 +13,16 @@ def build_map(conf):
   from utils.map import build_id_map
   build_id_map(conf)
 
+def cuda_available(conf):
+  # Querying CUDA breaks it in processes forked afterwards, so the
+  # zygote asks a separate process
+  if conf.start_mode != 'zygote':
+    return torch.cuda.is_available()
+  probe = 'import sys, torch; sys.exit(not torch.cuda.is_available())'
+  return subprocess.run([sys.executable, '-c', probe]).returncode == 0
+
 def exec_fuzz(conf):
-  if not os.path.exists('fuzz/id_map.py'):
+  if not os.path.exists(conf.harness_path):
     print_msg('Please build a map for identifiers predefined in the harness files first.',
               'ERROR')
     sys.exit(1)
@@ -37,11 +48,6 @@ def get_args():
   return arg_parser.parse_args(sys.argv[1:])
 
 def main():
-  if not torch.cuda.is_available():
-    print_msg('Montage only supports CUDA-enabled machines',
-              'ERROR')
-    sys.exit(1)
-
   # Increase max recursion depth limit
   sys.setrecursionlimit(10000)
 
@@ -49,6 +55,14 @@ def main():
   config_path = args.config
   conf = Config(config_path)
 
+  if (conf.device.startswith('cuda') and
+      not cuda_available(conf)):
+    print_msg('CUDA is not available; set "device" to "cpu" to run on CPUs',
+              'ERROR')
+    sys.exit(1)
+  set_device(conf.device)
+  set_hash_mode(conf.hash_mode)
+
   if args.opt == 'preprocess':
     exec_preprocess(conf)
   elif args.opt == 'train':
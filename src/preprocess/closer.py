@@ -0,0 +1,28 @@
+from utils import get_holes
+from utils import get_node_type
+
+def find_closers(new_frag_list):
+  # For each node type, the fragment whose subtree has the fewest
+  # fragments when every hole is closed the same way
+  frag_holes = []
+  for frag_idx, frag in enumerate(new_frag_list):
+    # The holes of an OoV fragment depend on the one drawn
+    if type(frag) != dict:
+      continue
+    hole_types = [node_type for _, _, node_type in get_holes(frag)]
+    frag_holes += [(frag_idx, get_node_type(frag), hole_types)]
+
+  # Costs only decrease, so this ends once no type gets cheaper
+  costs, closers = {}, {}
+  updated = True
+  while updated:
+    updated = False
+    for frag_idx, node_type, hole_types in frag_holes:
+      if any(hole_type not in costs for hole_type in hole_types):
+        continue
+      cost = 1 + sum(costs[hole_type] for hole_type in hole_types)
+      if node_type not in costs or cost < costs[node_type]:
+        costs[node_type] = cost
+        closers[node_type] = frag_idx
+        updated = True
+  return closers
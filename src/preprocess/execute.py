@@ -1,16 +1,15 @@
 import os
-import threading
 
 from subprocess import PIPE
 from subprocess import Popen
 
-from utils import kill_proc
 from utils import list_dir
 from utils import make_dir
 from utils import pool_map
 from utils import read
 from utils import write
 from utils.logger import print_msg
+from utils.watchdog import get_watchdog
 
 class Executor:
   def __init__(self, conf):
@@ -22,14 +21,13 @@ class Executor:
     return os.path.join(log_dir, log_name)
 
   def execute(self, proc, log_path, timeout):
-    timer = threading.Timer(timeout,
-                            lambda p: kill_proc(p), [proc])
-    timer.start()
+    watchdog = get_watchdog()
+    watch = watchdog.watch(proc, timeout)
     stdout, stderr = proc.communicate()
     ret = proc.returncode
+    watchdog.cancel(watch)
 
     self.write_log(log_path, stdout, stderr, ret)
-    timer.cancel()
 
   def run(self, js_path, cwd):
     cmd = [self._conf.eng_path]
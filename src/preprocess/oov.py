@@ -4,7 +4,7 @@ from utils import get_node_type
 from utils import hash_frag
 from utils.logger import print_msg
 
-def collect_oov(seed_dict, frag_list):
+def collect_oov(seed_dict, frag_list, hash_list):
   oov_types = set()
   hash_frag_list = set()
   oov_pool = {}
@@ -24,8 +24,7 @@ def collect_oov(seed_dict, frag_list):
     oov_types.add(node_type)
 
     # Add to OoV fragment list
-    hash_val = hash_frag(frag)
-    hash_frag_list.add(hash_val)
+    hash_frag_list.add(hash_list[frag_idx])
 
   return sorted_frags, oov_types, hash_frag_list, oov_pool
 
@@ -33,25 +32,38 @@ def get_oov_idx(frag, frag_dict):
   frag_type = get_node_type(frag)
   return frag_dict[frag_type]
 
-def is_oov(frag, hash_frag_list):
-  hash_val = hash_frag(frag)
+def is_oov(hash_val, hash_frag_list):
   return hash_val in hash_frag_list
 
+def map_frags(frag_list, hash_list,
+              hash_frag_list, new_frag_dict):
+  # New index of each fragment in frag_list
+  new_idx_list = []
+  for frag, hash_val in zip(frag_list, hash_list):
+    if is_oov(hash_val, hash_frag_list):
+      frag_idx = get_oov_idx(frag, new_frag_dict)
+    else:
+      frag_idx = new_frag_dict[hash_val]
+    new_idx_list += [frag_idx]
+  return new_idx_list
+
 def replace_uncommon(seed_dict, frag_list, frag_dict):
+  # Hash each fragment once
+  hash_list = [hash_frag(frag) for frag in frag_list]
+
   # Collect OoV
-  ret = collect_oov(seed_dict, frag_list)
+  ret = collect_oov(seed_dict, frag_list, hash_list)
   sorted_frags, oov_types, hash_frag_list, oov_pool = ret
 
   # Update frag_list & frag_dict
-  ret = update_frags(sorted_frags, frag_list,
+  ret = update_frags(sorted_frags, frag_list, hash_list,
                      hash_frag_list, oov_types)
   new_frag_list, new_frag_dict = ret
 
   # Update ast_frags
-  new_seed_dict = update_ast(seed_dict,
-                             frag_list,
-                             hash_frag_list,
-                             new_frag_dict)
+  new_idx_list = map_frags(frag_list, hash_list,
+                           hash_frag_list, new_frag_dict)
+  new_seed_dict = update_ast(seed_dict, new_idx_list)
 
   return (new_seed_dict,
           new_frag_dict, new_frag_list,
@@ -78,8 +90,7 @@ def sort_frags(seed_dict):
   print_msg(msg, 'INFO')
   return sorted_frags, oov_idx
 
-def update_ast(seed_dict,
-               frag_list, hash_frag_list, new_frag_dict):
+def update_ast(seed_dict, new_idx_list):
   new_seed_dict = {}
   num_files = len(seed_dict.keys())
   for idx, file_name in enumerate(seed_dict.keys()):
@@ -89,31 +100,26 @@ def update_ast(seed_dict,
     frag_seq, frag_info_seq = seed_dict[file_name]
 
     # Update frag_seq
-    new_frag_seq = update_frag_seq(frag_seq,
-                                   new_frag_dict,
-                                   frag_list,
-                                   hash_frag_list)
+    new_frag_seq = update_frag_seq(frag_seq, new_idx_list)
     # Update frag_info_seq
     new_frag_info_seq = update_frag_info(frag_info_seq,
-                                         new_frag_dict,
-                                         frag_list,
-                                         hash_frag_list)
+                                         new_idx_list)
     new_seed_dict[file_name] = (new_frag_seq, new_frag_info_seq)
   return new_seed_dict
 
-def update_frags(sorted_frags,
-                 frag_list, hash_frag_list, oov_types):
+def update_frags(sorted_frags, frag_list, hash_list,
+                 hash_frag_list, oov_types):
   new_frag_list = []
   new_frag_dict = {}
 
   # Append frags not in OoV
   for frag_idx in sorted_frags:
     frag = frag_list[frag_idx]
-    frag_type = get_node_type(frag)
-    if not is_oov(frag, hash_frag_list):
+    hash_val = hash_list[frag_idx]
+    if not is_oov(hash_val, hash_frag_list):
       frag_idx = len(new_frag_list)
       new_frag_list += [frag]
-      new_frag_dict[hash_frag(frag)] = frag_idx
+      new_frag_dict[hash_val] = frag_idx
 
   # Append OoVs
   for oov_type in oov_types:
@@ -123,28 +129,16 @@ def update_frags(sorted_frags,
 
   return new_frag_list, new_frag_dict
 
-def update_frag_info(frag_info_seq,
-                     new_frag_dict, frag_list, hash_frag_list):
+def update_frag_info(frag_info_seq, new_idx_list):
   new_frag_info_seq = []
   for parent_idx, frag_type in frag_info_seq:
-    parent_frag = frag_list[parent_idx]
-    if is_oov(parent_frag, hash_frag_list):
-      parent_idx = get_oov_idx(parent_frag,
-                               new_frag_dict)
-    else:
-      parent_idx = new_frag_dict[hash_frag(parent_frag)]
+    parent_idx = new_idx_list[parent_idx]
     frag_info = (parent_idx, frag_type)
     new_frag_info_seq += [frag_info]
   return new_frag_info_seq
 
-def update_frag_seq(frag_seq,
-                    new_frag_dict, frag_list, hash_frag_list):
+def update_frag_seq(frag_seq, new_idx_list):
   new_frag_seq = []
   for frag_idx in frag_seq:
-    frag = frag_list[frag_idx]
-    if is_oov(frag, hash_frag_list):
-      frag_idx = get_oov_idx(frag, new_frag_dict)
-    else:
-      frag_idx = new_frag_dict[hash_frag(frag)]
-    new_frag_seq += [frag_idx]
+    new_frag_seq += [new_idx_list[frag_idx]]
   return new_frag_seq
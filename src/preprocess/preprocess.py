@@ -2,6 +2,7 @@ import os
 from multiprocessing import Pool
 
 from preprocess import aggregate
+from preprocess import closer
 from preprocess import execute
 from preprocess import fragmentize
 from preprocess import normalize
@@ -10,7 +11,7 @@ from preprocess import strip
 from preprocess import triage
 from utils import init_worker
 from utils import make_dir
-from utils import store_pickle
+from utils.dataset import write_dataset
 from utils.logger import print_msg
 from utils.parse import Parser
 
@@ -53,53 +54,40 @@ class Preprocessor:
      self._new_frag_dict, self._new_frag_list,
      self._oov_pool) = renewed_data
 
+  def find_closers(self):
+    self._closers = closer.find_closers(self._new_frag_list)
+
   def preprocess(self):
-    print_msg('[1/8] Filtering out JS with errors')
+    print_msg('[1/9] Filtering out JS with errors')
     self.remove_js_with_errors()
 
-    print_msg('[2/8] Parsing JS code into ASTs')
+    print_msg('[2/9] Parsing JS code into ASTs')
     self.parse()
 
-    print_msg('[3/8] Stripping args of eval func calls')
+    print_msg('[3/9] Stripping args of eval func calls')
     self.strip_eval()
 
-    print_msg('[4/8] Normalizing identifiers')
+    print_msg('[4/9] Normalizing identifiers')
     self.normalize_ast()
 
-    print_msg('[5/8] Fragmentizing JS ASTs')
+    print_msg('[5/9] Fragmentizing JS ASTs')
     ast_data = self.fragment_ast()
 
-    print_msg('[6/8] Aggregating fragments')
+    print_msg('[6/9] Aggregating fragments')
     self.aggregate_frags(ast_data)
     self._pool.terminate()
 
-    print_msg('[7/8] Replacing uncommon fragments')
+    print_msg('[7/9] Replacing uncommon fragments')
     self.mark_oov()
 
-    print_msg('[8/8] Writing data into files')
+    print_msg('[8/9] Finding closing fragments')
+    self.find_closers()
+
+    print_msg('[9/9] Writing data into files')
     self.write_data()
 
   def write_data(self):
-    data_path = os.path.join(self._conf.data_dir,
-                                'data.p')
-    train_data_path = os.path.join(self._conf.data_dir,
-                                    'train_data.p')
-    seed_data_path = os.path.join(self._conf.data_dir,
-                                  'seed.p')
-
-    # Write a seed file
-    seed = (self._seed_dict, self._frag_list,
-            self._new_seed_dict)
-    store_pickle(seed_data_path, seed)
-
-    # Write a train data file
-    train_data = (self._new_seed_dict,
-                  self._new_frag_list,
-                  self._type_list,
-                  self._type_dict)
-    store_pickle(train_data_path, train_data)
-
-    # Write a data file
-    data = (self._new_frag_list, self._new_frag_dict,
-            self._oov_pool, self._type_dict)
-    store_pickle(data_path, data)
+    write_dataset(self._conf.data_dir,
+                  self._seed_dict, self._frag_list,
+                  self._new_seed_dict, self._new_frag_list,
+                  self._oov_pool, self._type_list, self._closers)
@@ -83,7 +83,8 @@ def get_func(eng_name):
 def get_ret(log):
   ret = log.split('MONTAGE_RETURN: ')
   ret = int(ret[1])
-  if ret < 0 and ret != -9:
+  # Killed by the watchdog after a timeout
+  if ret < 0 and ret not in [-9, -15]:
     return ret
   else:
     return 0
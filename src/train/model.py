@@ -86,7 +86,8 @@ class LSTM(nn.Module):
 
   def build_mask(self, type_chunk, time_step, vocab_size):
     # Frag & Type Matrix
-    type_mask = torch.cuda.ByteTensor(self.type_mask)
+    type_mask = torch.tensor(self.type_mask, dtype=torch.uint8,
+                             device=type_chunk.device)
     tmask = type_chunk.view(-1).long()
 
     # Mask Type Matching Frags
@@ -151,6 +152,20 @@ class LSTM(nn.Module):
     cross_entropy = self.loss_function(out, output_chunk)
     return cross_entropy
 
+  def get_output(self, out, parent_idx, frag_type):
+    # Concatenate Additional Features
+    parent_idx = self.embeddings(parent_idx)
+    parent_idx = parent_idx.view(1, -1, self.embedding_dim)
+    frag_type = frag_type.view(1, -1, 1)
+    out = out.view(1, -1, self.embedding_dim)
+    out = torch.cat((out, parent_idx, frag_type), dim=2)
+
+    # Output Layer
+    out = out.contiguous().view(-1, self.out_dim)
+    out = self.fc(out)
+    out = out.view(1, -1, self.vocab_size)
+    return out
+
   def get_top_k_loss(self, out, type_chunk):
     time_step, vocab_size = out.shape
 
@@ -181,16 +196,27 @@ class LSTM(nn.Module):
     else:
       out, hidden = self.lstm(embeds, hidden)
 
-    # Concatenate Additional Features
-    parent_idx = self.embeddings(parent_idx)
-    parent_idx = parent_idx.view(1, -1, self.embedding_dim)
-    frag_type = frag_type.view(1, -1, 1)
-    out = out.view(1, -1, self.embedding_dim)
-    out = torch.cat((out, parent_idx, frag_type), dim=2)
+    out = self.get_output(out, parent_idx, frag_type)
+    return out, hidden
 
-    # Output Layer
-    out = out.contiguous().view(-1, self.out_dim)
-    out = self.fc(out)
-    out = out.view(1, -1, self.vocab_size)
+  def step(self, inputs, hidden, parent_idx, frag_type):
+    # Input Layer (a single time step for each sequence in the batch)
+    embeds = self.embeddings(inputs)
+    embeds = embeds.view(1, -1, self.embedding_dim)
+
+    # Hidden Layer
+    out, hidden = self.lstm(embeds, hidden)
+
+    out = self.get_output(out, parent_idx, frag_type)
     return out, hidden
 
+  def warm(self, inputs, hidden=None):
+    # Feed a prefix, optionally resuming from a hidden state
+    embeds = self.embeddings(inputs)
+    embeds = embeds.view(-1, 1, self.embedding_dim)
+
+    if is_none(hidden):
+      _, hidden = self.lstm(embeds)
+    else:
+      _, hidden = self.lstm(embeds, hidden)
+    return hidden
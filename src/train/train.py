@@ -12,9 +12,8 @@ from tqdm import tqdm
 
 from train.model import LSTM
 from utils import data2tensor
-from utils import get_node_type
-from utils import load_pickle
 from utils import make_dir
+from utils.dataset import Dataset
 from utils.logger import print_msg
 
 def arr2data(seed_data):
@@ -41,8 +40,7 @@ def pad_input(batch):
   output_batch, _ = pad_sequence(output_batch)
 
   pfrag_batch, type_batch = [], []
-  for frag_info_seq in frag_info_batch:
-    pfrag_seq, type_seq = zip(*frag_info_seq)
+  for pfrag_seq, type_seq in frag_info_batch:
     pfrag_batch += [pfrag_seq]
     type_batch += [type_seq]
 
@@ -75,6 +73,7 @@ def repackage_hidden(h):
 class ModelTrainer:
   def __init__(self, conf):
     self._batch_size = conf.batch_size
+    self._device = conf.device
     self._emb_size = conf.emb_size
     self._epoch = conf.epoch
     self._gamma = conf.gamma
@@ -84,8 +83,7 @@ class ModelTrainer:
     self._split_size = conf.split_size
     self._weight_decay = conf.weight_decay
 
-    self._train_data_path = os.path.join(conf.data_dir,
-                                         'train_data.p')
+    self._dataset = Dataset(conf.data_dir)
     self._model_dir = os.path.join(conf.data_dir,
                                    'models')
     make_dir(self._model_dir)
@@ -108,14 +106,8 @@ class ModelTrainer:
   def build_type_mask(self):
     type_mask = []
     type_size = len(self._type_list)
-    for frag in self._oov_frag_list:
+    for frag_type in self._oov_frag_types:
       frag_type_mask = [0 for i in range(type_size)]
-      # Fragments
-      if type(frag) == dict:
-        frag_type = get_node_type(frag)
-      # Out of vocabularies
-      else:
-        frag_type = frag
       type_idx = self._type_dict[frag_type]
       frag_type_mask[type_idx] = 1
       type_mask += [frag_type_mask]
@@ -135,11 +127,11 @@ class ModelTrainer:
 
     type_mask = self.build_type_mask()
     loss = CrossEntropyLoss(reduction='none')
-    vocab_size = len(self._oov_frag_list)
+    vocab_size = len(self._oov_frag_types)
     batch_per_gpu = int(self._emb_size / self._num_gpu)
     model = LSTM(vocab_size, self._emb_size,
                  type_mask, loss, batch_per_gpu)
-    model.cuda()
+    model.to(self._device)
 
     optimizer = SGD(model.parameters(),
                     lr=self._lr,
@@ -151,19 +143,18 @@ class ModelTrainer:
     return model, optimizer, scheduler
 
   def load_data(self):
-    train_data = load_pickle(self._train_data_path)
-    (oov_seed_dict,
-     self._oov_frag_list,
-     self._type_list,
-     self._type_dict) = train_data
+    # Fragments themselves are never decoded for training
+    self._oov_frag_types = self._dataset.new_frag_types()
+    self._type_list = self._dataset.type_list()
+    self._type_dict = self._dataset.type_dict()
 
-    seed_data = list(oov_seed_dict.values())
+    seed_data = self._dataset.train_seqs()
     train, test = self.split_data(seed_data)
 
     return train, test
 
   def print_config(self):
-    vocab_size = len(self._oov_frag_list)
+    vocab_size = len(self._oov_frag_types)
     msg = '# of Vocabularies: %d' % vocab_size
     print_msg(msg, 'INFO')
 
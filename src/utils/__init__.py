@@ -1,6 +1,5 @@
 import json
 import os
-import pickle
 import shutil
 import signal
 import string
@@ -8,27 +7,64 @@ import torch
 import ujson
 
 from functools import partial
+from hashlib import blake2b
 from hashlib import sha1
 from random import choice
 
 from utils.logger import get_msg
 from utils.logger import print_msg
 from utils.node import PROP_DICT
+from utils.node import TERM_TYPE
+
+DEVICE = 'cuda'
+HASH_MODE = 'fast'
+
+TENSOR_TYPES = {
+  'Long': torch.long,
+  'Byte': torch.uint8,
+  'Float': torch.float,
+}
 
 def data2tensor(batch, tensor_type='Long'):
-  if tensor_type == 'Long':
-    batch = torch.cuda.LongTensor(batch)
-  elif tensor_type == 'Byte':
-    batch = torch.cuda.ByteTensor(batch)
-  elif tensor_type == 'Float':
-    batch = torch.cuda.FloatTensor(batch)
-  return batch
+  dtype = TENSOR_TYPES[tensor_type]
+  return torch.tensor(batch, dtype=dtype, device=DEVICE)
+
+def get_holes(frag):
+  # (property, list index, node type) of each pruned child
+  # in the order the holes are filled
+  holes = []
+  node_type = get_node_type(frag)
+  if node_type in TERM_TYPE:
+    return tuple(holes)
+
+  for key in PROP_DICT[node_type]:
+    if key not in frag: continue
+    child = frag[key]
+
+    if is_single_node(child):
+      if is_pruned(child):
+        holes += [(key, None, get_node_type(child))]
+    elif is_node_list(child):
+      for idx, _child in enumerate(child):
+        if _child != None and is_pruned(_child):
+          holes += [(key, idx, get_node_type(_child))]
+  return tuple(holes)
 
 def get_node_type(node):
   return node['type']
 
 def hash_frag(frag):
-  return hash_val(stringify_frag(frag))
+  # Hex SHA-1 keys of data files preprocessed before the fast mode
+  if HASH_MODE == 'legacy':
+    return hash_val(stringify_frag(frag))
+
+  # 64-bit digest of the canonical JSON encoding
+  try:
+    frag = ujson.dumps(frag, sort_keys=True)
+  except OverflowError:
+    frag = json.dumps(frag, sort_keys=True, separators=(',', ':'))
+  digest = blake2b(str.encode(frag), digest_size=8).digest()
+  return int.from_bytes(digest, 'big')
 
 def hash_val(text):
   if type(text) is str:
@@ -41,14 +77,16 @@ def init_worker():
 def is_node_list(node):
   return type(node) == list
 
+def is_pruned(node):
+  keys = node.keys()
+  return (len(keys) == 1 and
+          'type' in keys and
+          get_node_type(node) not in TERM_TYPE)
+
 def is_single_node(node):
   return (type(node) == dict and
           'type' in node)
 
-def kill_proc(proc):
-  if proc.poll() is None:
-    proc.kill()
-
 def list_dir(dir_path):
   return [os.path.join(dir_path, f) for f in os.listdir(dir_path)]
 
@@ -64,11 +102,6 @@ def load_ast(ast_path):
   js_name = os.path.basename(ast_path)[:-2]
   return js_name, ast
 
-def load_pickle(dpath):
-  with open(dpath, 'rb') as f:
-    data = pickle.load(f)
-  return data
-
 def make_dir(dir_path):
   ans = 'y'
   if os.path.exists(dir_path):
@@ -111,9 +144,13 @@ def read(file_name, mode='rb', encoding=None):
   with open(file_name, mode, encoding=encoding) as f:
     return f.read()
 
-def store_pickle(dpath, data):
-  with open(dpath, 'wb') as f:
-    pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+def set_device(device):
+  global DEVICE
+  DEVICE = device
+
+def set_hash_mode(hash_mode):
+  global HASH_MODE
+  HASH_MODE = hash_mode
 
 def stringify_frag(node):
   str_val = ''
@@ -1,46 +1,39 @@
-const crypto = require('crypto');
 const escodegen = require('escodegen');
-const fs = require('fs');
-const path = require('path');
 
+// Each request is a 4-byte big-endian length followed by a JSON AST.
+// Each response is a status byte (0: code, 1: error), a 4-byte big-endian
+// length, and the generated code or the error message.
+const HEADER_SIZE = 4;
 
-function extract_name(ast_path){
-  start = ast_path.lastIndexOf('/') + 1;
-  end = ast_path.lastIndexOf('.');
-  hash = ast_path.slice(start, end);
-  jsname = hash + '.js';
-  return jsname
-}
-
-function generate_code(ast_path){
-  ast = read_file(ast_path);
+function generate_code(ast){
   ast = JSON.parse(ast);
   code = escodegen.generate(ast);
   return code;
 }
 
-function read_file(ast_path){
-  return fs.readFileSync(ast_path, 'utf8');
+function write_frame(status, payload){
+  payload = Buffer.from(payload, 'utf8');
+  header = Buffer.alloc(HEADER_SIZE + 1);
+  header.writeUInt8(status, 0);
+  header.writeUInt32BE(payload.length, 1);
+  process.stdout.write(Buffer.concat([header, payload]));
 }
 
-function write_file(des_path, ast_path, code){
-  jsname = extract_name(ast_path);
-  js_path = path.join(des_path, jsname);
-  fs.writeFileSync(js_path, code);
-  return js_path
-}
+buffer = Buffer.alloc(0);
 
-des_path = process.argv[2];
+process.stdin.on('data', function (chunk) {
+  buffer = Buffer.concat([buffer, chunk]);
+  while (buffer.length >= HEADER_SIZE) {
+    size = buffer.readUInt32BE(0);
+    if (buffer.length < HEADER_SIZE + size) break;
 
-process.stdin.setEncoding('utf8');
-process.stdin.on('data', function (ast_path) {
-  try {
-      ast_path = ast_path.trim();
-      code = generate_code(ast_path);
-      js_path = write_file(des_path, ast_path, code);
-      process.stdout.write(js_path + '\n');
-  } catch (err) {
-    err = '[!] Error - ' + err + '\n';
-    process.stdout.write(err);
+    ast = buffer.toString('utf8', HEADER_SIZE, HEADER_SIZE + size);
+    buffer = buffer.slice(HEADER_SIZE + size);
+    try {
+      code = generate_code(ast);
+      write_frame(0, code);
+    } catch (err) {
+      write_frame(1, '[!] Error - ' + err);
+    }
   }
 });
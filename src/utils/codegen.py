@@ -0,0 +1,1219 @@
+import math
+import re
+import unicodedata
+
+# A pure-Python port of the default output of escodegen.generate()
+
+PRECEDENCE = {
+  'Sequence': 0,
+  'Yield': 1,
+  'Assignment': 1,
+  'Conditional': 2,
+  'ArrowFunction': 2,
+  'LogicalOR': 3,
+  'LogicalAND': 4,
+  'BitwiseOR': 5,
+  'BitwiseXOR': 6,
+  'BitwiseAND': 7,
+  'Equality': 8,
+  'Relational': 9,
+  'BitwiseSHIFT': 10,
+  'Additive': 11,
+  'Multiplicative': 12,
+  'Exponentiation': 13,
+  'Await': 14,
+  'Unary': 14,
+  'Postfix': 15,
+  'Call': 16,
+  'New': 17,
+  'TaggedTemplate': 18,
+  'Member': 19,
+  'Primary': 20,
+}
+
+BINARY_PRECEDENCE = {
+  '||': PRECEDENCE['LogicalOR'],
+  '&&': PRECEDENCE['LogicalAND'],
+  '|': PRECEDENCE['BitwiseOR'],
+  '^': PRECEDENCE['BitwiseXOR'],
+  '&': PRECEDENCE['BitwiseAND'],
+  '==': PRECEDENCE['Equality'],
+  '!=': PRECEDENCE['Equality'],
+  '===': PRECEDENCE['Equality'],
+  '!==': PRECEDENCE['Equality'],
+  '<': PRECEDENCE['Relational'],
+  '>': PRECEDENCE['Relational'],
+  '<=': PRECEDENCE['Relational'],
+  '>=': PRECEDENCE['Relational'],
+  'in': PRECEDENCE['Relational'],
+  'instanceof': PRECEDENCE['Relational'],
+  '<<': PRECEDENCE['BitwiseSHIFT'],
+  '>>': PRECEDENCE['BitwiseSHIFT'],
+  '>>>': PRECEDENCE['BitwiseSHIFT'],
+  '+': PRECEDENCE['Additive'],
+  '-': PRECEDENCE['Additive'],
+  '*': PRECEDENCE['Multiplicative'],
+  '%': PRECEDENCE['Multiplicative'],
+  '/': PRECEDENCE['Multiplicative'],
+  '**': PRECEDENCE['Exponentiation'],
+}
+
+# Expression flags
+F_ALLOW_IN = 1
+F_ALLOW_CALL = 1 << 1
+F_ALLOW_UNPARATH_NEW = 1 << 2
+# Statement flags
+F_FUNC_BODY = 1 << 3
+F_DIRECTIVE_CTX = 1 << 4
+F_SEMICOLON_OPT = 1 << 5
+
+E_FTT = F_ALLOW_CALL | F_ALLOW_UNPARATH_NEW
+E_TTF = F_ALLOW_IN | F_ALLOW_CALL
+E_TTT = F_ALLOW_IN | F_ALLOW_CALL | F_ALLOW_UNPARATH_NEW
+E_TFF = F_ALLOW_IN
+E_FFT = F_ALLOW_UNPARATH_NEW
+E_TFT = F_ALLOW_IN | F_ALLOW_UNPARATH_NEW
+
+S_TFFF = F_ALLOW_IN
+S_TFFT = F_ALLOW_IN | F_SEMICOLON_OPT
+S_FFFF = 0
+S_TFTF = F_ALLOW_IN | F_DIRECTIVE_CTX
+S_TTFF = F_ALLOW_IN | F_FUNC_BODY
+
+INDENT = '    '
+
+# Maximum number of memoized literals
+MEMO_SIZE = 1 << 16
+
+ID_PART_ASCII = frozenset('$_0123456789'
+                          'abcdefghijklmnopqrstuvwxyz'
+                          'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+ID_PART_CATEGORIES = frozenset(['Lu', 'Ll', 'Lt', 'Lm', 'Lo', 'Nl',
+                                'Mn', 'Mc', 'Nd', 'Pc'])
+LINE_TERMINATORS = frozenset('\n\r\u2028\u2029')
+WHITE_SPACES = frozenset('\t\x0b\x0c \xa0\u1680\u2000\u2001\u2002\u2003'
+                         '\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+                         '\u202f\u205f\u3000\ufeff')
+
+# Printable ASCII except quotes and backslashes
+PLAIN_STRING = re.compile(r'[ !#-&(-\[\]-~]*\Z')
+
+class CodeGenerator:
+  def __init__(self):
+    self._base = ''
+    self._memo = {}
+
+    self._expr_gens = {
+      'ArrayExpression': self.array_expr,
+      'ArrayPattern': self.array_pattern,
+      'ArrowFunctionExpression': self.arrow_func_expr,
+      'AssignmentExpression': self.assign_expr,
+      'AssignmentPattern': self.assign_pattern,
+      'AwaitExpression': self.await_expr,
+      'BinaryExpression': self.binary_expr,
+      'CallExpression': self.call_expr,
+      'ClassExpression': self.class_expr,
+      'ConditionalExpression': self.cond_expr,
+      'ExportSpecifier': self.export_spec,
+      'FunctionExpression': self.func_expr,
+      'Identifier': self.identifier,
+      'Import': self.import_callee,
+      'ImportDefaultSpecifier': self.import_default_spec,
+      'ImportNamespaceSpecifier': self.import_namespace_spec,
+      'ImportSpecifier': self.import_spec,
+      'Literal': self.literal,
+      'LogicalExpression': self.binary_expr,
+      'MemberExpression': self.member_expr,
+      'MetaProperty': self.meta_property,
+      'MethodDefinition': self.method_def,
+      'NewExpression': self.new_expr,
+      'ObjectExpression': self.object_expr,
+      'ObjectPattern': self.object_pattern,
+      'Property': self.property,
+      'RestElement': self.rest_elem,
+      'SequenceExpression': self.seq_expr,
+      'SpreadElement': self.spread_elem,
+      'Super': self.super_expr,
+      'TaggedTemplateExpression': self.tagged_template_expr,
+      'TemplateElement': self.template_elem,
+      'TemplateLiteral': self.template_literal,
+      'ThisExpression': self.this_expr,
+      'UnaryExpression': self.unary_expr,
+      'UpdateExpression': self.update_expr,
+      'YieldExpression': self.yield_expr,
+    }
+    self._stmt_gens = {
+      'BlockStatement': self.block_stmt,
+      'BreakStatement': self.break_stmt,
+      'CatchClause': self.catch_clause,
+      'ClassBody': self.class_body,
+      'ClassDeclaration': self.class_decl,
+      'ContinueStatement': self.continue_stmt,
+      'DebuggerStatement': self.debugger_stmt,
+      'DoWhileStatement': self.do_while_stmt,
+      'EmptyStatement': self.empty_stmt,
+      'ExportAllDeclaration': self.export_all_decl,
+      'ExportDefaultDeclaration': self.export_default_decl,
+      'ExportNamedDeclaration': self.export_named_decl,
+      'ExpressionStatement': self.expr_stmt,
+      'ForInStatement': self.for_in_stmt,
+      'ForOfStatement': self.for_of_stmt,
+      'ForStatement': self.for_stmt,
+      'FunctionDeclaration': self.func_decl,
+      'IfStatement': self.if_stmt,
+      'ImportDeclaration': self.import_decl,
+      'LabeledStatement': self.labeled_stmt,
+      'Program': self.program,
+      'ReturnStatement': self.return_stmt,
+      'SwitchCase': self.switch_case,
+      'SwitchStatement': self.switch_stmt,
+      'ThrowStatement': self.throw_stmt,
+      'TryStatement': self.try_stmt,
+      'VariableDeclaration': self.var_decl,
+      'VariableDeclarator': self.var_declarator,
+      'WhileStatement': self.while_stmt,
+      'WithStatement': self.with_stmt,
+    }
+
+  def array_expr(self, expr, prec, flags, is_pattern=False):
+    elements = expr['elements']
+    if len(elements) == 0:
+      return '[]'
+
+    multiline = not is_pattern and len(elements) > 1
+    result = '[\n' if multiline else '['
+    base = self.indent()
+    for idx, elem in enumerate(elements):
+      if elem is None:
+        if multiline:
+          result += base
+        if idx + 1 == len(elements):
+          result += ','
+      else:
+        if multiline:
+          result += base
+        result += self.gen_expr(elem, PRECEDENCE['Assignment'],
+                                E_TTT)
+      if idx + 1 < len(elements):
+        result += ',\n' if multiline else ', '
+    self.dedent()
+
+    if multiline:
+      if not ends_with_line_terminator(result):
+        result += '\n'
+      result += self._base
+    return result + ']'
+
+  def array_pattern(self, expr, prec, flags):
+    return self.array_expr(expr, prec, flags, True)
+
+  def arrow_func_expr(self, expr, prec, flags):
+    return parenthesize(self.gen_func_body(expr),
+                        PRECEDENCE['ArrowFunction'], prec)
+
+  def assign_expr(self, expr, prec, flags):
+    return self.gen_assign(expr['left'], expr['right'],
+                           expr['operator'], prec, flags)
+
+  def assign_pattern(self, expr, prec, flags):
+    return self.gen_assign(expr['left'], expr['right'],
+                           '=', prec, flags)
+
+  def await_expr(self, expr, prec, flags):
+    result = join('await',
+                  self.gen_expr(expr['argument'],
+                                PRECEDENCE['Await'], E_TTT))
+    return parenthesize(result, PRECEDENCE['Await'], prec)
+
+  def binary_expr(self, expr, prec, flags):
+    operator = expr['operator']
+    cur_prec = BINARY_PRECEDENCE[operator]
+    if operator == '**':
+      left_prec = PRECEDENCE['Postfix']
+      right_prec = cur_prec
+    else:
+      left_prec = cur_prec
+      right_prec = cur_prec + 1
+    if cur_prec < prec:
+      flags |= F_ALLOW_IN
+
+    left = self.gen_expr(expr['left'], left_prec, flags)
+    # Keep a regexp from swallowing in and instanceof
+    if left[-1] == '/' and is_identifier_part(operator[0]):
+      result = left + ' ' + operator
+    else:
+      result = join(left, operator)
+
+    right = self.gen_expr(expr['right'], right_prec, flags)
+    if ((operator == '/' and right[0] == '/') or
+        (operator[-1] == '<' and right[:3] == '!--')):
+      result += ' ' + right
+    else:
+      result = join(result, right)
+
+    if operator == 'in' and not flags & F_ALLOW_IN:
+      return '(' + result + ')'
+    return parenthesize(result, cur_prec, prec)
+
+  def block_stmt(self, stmt, flags):
+    result = '{\n'
+    body = stmt['body']
+    base = self.indent()
+    body_flags = S_TFFF
+    if flags & F_FUNC_BODY:
+      body_flags |= F_DIRECTIVE_CTX
+    for idx, child in enumerate(body):
+      if idx == len(body) - 1:
+        body_flags |= F_SEMICOLON_OPT
+      frag = base + self.gen_stmt(child, body_flags)
+      result += frag
+      if not ends_with_line_terminator(frag):
+        result += '\n'
+    self.dedent()
+    return result + self._base + '}'
+
+  def break_stmt(self, stmt, flags):
+    label = stmt.get('label')
+    if label:
+      return 'break ' + label['name'] + ';'
+    return 'break;'
+
+  def call_expr(self, expr, prec, flags):
+    result = self.gen_expr(expr['callee'], PRECEDENCE['Call'], E_TTF)
+    result += '(' + self.gen_args(expr['arguments']) + ')'
+    if not flags & F_ALLOW_CALL:
+      return '(' + result + ')'
+    return parenthesize(result, PRECEDENCE['Call'], prec)
+
+  def catch_clause(self, stmt, flags):
+    param = stmt.get('param')
+    if param:
+      self.indent()
+      param = self.gen_expr(param, PRECEDENCE['Sequence'], E_TTT)
+      self.dedent()
+      result = 'catch (' + param + ')'
+    else:
+      result = 'catch'
+    return result + self.maybe_block(stmt['body'], S_TFFF)
+
+  def class_body(self, stmt, flags):
+    result = '{\n'
+    body = stmt['body']
+    base = self.indent()
+    for idx, child in enumerate(body):
+      result += base
+      result += self.gen_expr(child, PRECEDENCE['Sequence'], E_TTT)
+      if idx + 1 < len(body):
+        result += '\n'
+    self.dedent()
+
+    if not ends_with_line_terminator(result):
+      result += '\n'
+    return result + self._base + '}'
+
+  def class_decl(self, stmt, flags):
+    result = 'class'
+    if stmt.get('id'):
+      result = join(result,
+                    self.gen_expr(stmt['id'],
+                                  PRECEDENCE['Sequence'], E_TTT))
+    if stmt.get('superClass'):
+      frag = join('extends',
+                  self.gen_expr(stmt['superClass'],
+                                PRECEDENCE['Unary'], E_TTT))
+      result = join(result, frag)
+    return result + ' ' + self.gen_stmt(stmt['body'], S_TFFT)
+
+  def class_expr(self, expr, prec, flags):
+    return self.class_decl(expr, S_TFFF)
+
+  def cond_expr(self, expr, prec, flags):
+    if PRECEDENCE['Conditional'] < prec:
+      flags |= F_ALLOW_IN
+    result = (self.gen_expr(expr['test'],
+                            PRECEDENCE['LogicalOR'], flags) +
+              ' ? ' +
+              self.gen_expr(expr['consequent'],
+                            PRECEDENCE['Assignment'], flags) +
+              ' : ' +
+              self.gen_expr(expr['alternate'],
+                            PRECEDENCE['Assignment'], flags))
+    return parenthesize(result, PRECEDENCE['Conditional'], prec)
+
+  def continue_stmt(self, stmt, flags):
+    label = stmt.get('label')
+    if label:
+      return 'continue ' + label['name'] + ';'
+    return 'continue;'
+
+  def debugger_stmt(self, stmt, flags):
+    return 'debugger;'
+
+  def dedent(self):
+    self._base = self._base[:-len(INDENT)]
+
+  def do_while_stmt(self, stmt, flags):
+    # `do 42 while (cond)` needs a semicolon
+    result = join('do', self.maybe_block(stmt['body'], S_TFFF))
+    result = self.maybe_block_suffix(stmt['body'], result)
+    test = self.gen_expr(stmt['test'], PRECEDENCE['Sequence'], E_TTT)
+    return join(result, 'while (' + test + ');')
+
+  def empty_stmt(self, stmt, flags):
+    return ';'
+
+  def export_all_decl(self, stmt, flags):
+    source = self.gen_expr(stmt['source'],
+                           PRECEDENCE['Sequence'], E_TTT)
+    return 'export * from ' + source + ';'
+
+  def export_default_decl(self, stmt, flags):
+    body_flags = S_TFFT if flags & F_SEMICOLON_OPT else S_TFFF
+    decl = stmt['declaration']
+    if get_type(decl) in self._stmt_gens:
+      decl = self.gen_stmt(decl, body_flags)
+    else:
+      decl = self.gen_expr(decl, PRECEDENCE['Assignment'], E_TTT) + ';'
+    return join('export default', decl)
+
+  def export_named_decl(self, stmt, flags):
+    body_flags = S_TFFT if flags & F_SEMICOLON_OPT else S_TFFF
+    if stmt.get('declaration'):
+      return join('export', self.gen_stmt(stmt['declaration'],
+                                          body_flags))
+
+    specs = stmt.get('specifiers')
+    if not specs:
+      if specs is None:
+        return 'export'
+      result = 'export { }'
+    else:
+      result = 'export {\n'
+      base = self.indent()
+      for idx, spec in enumerate(specs):
+        result += base
+        result += self.gen_expr(spec, PRECEDENCE['Sequence'], E_TTT)
+        if idx + 1 < len(specs):
+          result += ',\n'
+      self.dedent()
+      if not ends_with_line_terminator(result):
+        result += '\n'
+      result += self._base + '}'
+
+    if stmt.get('source'):
+      source = self.gen_expr(stmt['source'],
+                             PRECEDENCE['Sequence'], E_TTT)
+      return join(result, 'from ' + source + ';')
+    return result + ';'
+
+  def export_spec(self, expr, prec, flags):
+    local = expr['local']
+    result = local['name']
+    exported = expr.get('exported')
+    if exported and exported['name'] != local['name']:
+      result += ' as ' + exported['name']
+    return result
+
+  def expr_stmt(self, stmt, flags):
+    result = self.gen_expr(stmt['expression'],
+                           PRECEDENCE['Sequence'], E_TTT)
+    # '{', 'function', 'class' are not allowed in this position
+    if (result[0] == '{' or
+        is_class_prefixed(result) or
+        is_function_prefixed(result) or
+        is_async_prefixed(result)):
+      return '(' + result + ');'
+    return result + ';'
+
+  def for_in_stmt(self, stmt, flags):
+    body_flags = S_TFFT if flags & F_SEMICOLON_OPT else S_TFFF
+    return self.gen_iteration('in', stmt, body_flags)
+
+  def for_of_stmt(self, stmt, flags):
+    body_flags = S_TFFT if flags & F_SEMICOLON_OPT else S_TFFF
+    return self.gen_iteration('of', stmt, body_flags)
+
+  def for_stmt(self, stmt, flags):
+    result = 'for ('
+    self.indent()
+    init = stmt.get('init')
+    if init:
+      if get_type(init) == 'VariableDeclaration':
+        result += self.gen_stmt(init, S_FFFF)
+      else:
+        result += self.gen_expr(init, PRECEDENCE['Sequence'], E_FTT)
+        result += ';'
+    else:
+      result += ';'
+
+    if stmt.get('test'):
+      result += ' ' + self.gen_expr(stmt['test'],
+                                    PRECEDENCE['Sequence'], E_TTT)
+    result += ';'
+
+    if stmt.get('update'):
+      result += ' ' + self.gen_expr(stmt['update'],
+                                    PRECEDENCE['Sequence'], E_TTT)
+    result += ')'
+    self.dedent()
+
+    body_flags = S_TFFT if flags & F_SEMICOLON_OPT else S_TFFF
+    return result + self.maybe_block(stmt['body'], body_flags)
+
+  def func_decl(self, stmt, flags):
+    result = gen_async_prefix(stmt) + 'function'
+    result += gen_star_suffix(stmt) or ' '
+    if stmt.get('id'):
+      result += stmt['id']['name']
+    return result + self.gen_func_body(stmt)
+
+  def func_expr(self, expr, prec, flags):
+    return self.func_decl(expr, S_TFFF)
+
+  def gen_args(self, args):
+    args = [self.gen_expr(arg, PRECEDENCE['Assignment'], E_TTT)
+            for arg in args]
+    return ', '.join(args)
+
+  def gen_assign(self, left, right, operator, prec, flags):
+    if PRECEDENCE['Assignment'] < prec:
+      flags |= F_ALLOW_IN
+    result = (self.gen_expr(left, PRECEDENCE['Call'], flags) +
+              ' ' + operator + ' ' +
+              self.gen_expr(right, PRECEDENCE['Assignment'], flags))
+    return parenthesize(result, PRECEDENCE['Assignment'], prec)
+
+  def gen_expr(self, expr, prec, flags):
+    gen = self._expr_gens[get_type(expr)]
+    return gen(expr, prec, flags)
+
+  def gen_func_body(self, node):
+    result = self.gen_func_params(node)
+    if get_type(node) == 'ArrowFunctionExpression':
+      result += ' =>'
+
+    if node.get('expression'):
+      body = self.gen_expr(node['body'], PRECEDENCE['Assignment'],
+                           E_TTT)
+      if body[0] == '{':
+        body = '(' + body + ')'
+      return result + ' ' + body
+    return result + self.maybe_block(node['body'], S_TTFF)
+
+  def gen_func_params(self, node):
+    params = node['params']
+    if get_type(node) == 'ArrowFunctionExpression':
+      # arg => { } case
+      if (len(params) == 1 and
+          get_type(params[0]) == 'Identifier'):
+        return gen_async_prefix(node) + params[0]['name']
+      result = gen_async_prefix(node)
+    else:
+      result = ''
+
+    params = [self.gen_pattern(param, PRECEDENCE['Assignment'], E_TTT)
+              for param in params]
+    return result + '(' + ', '.join(params) + ')'
+
+  def gen_iteration(self, operator, stmt, flags):
+    if stmt.get('await'):
+      result = 'for await ('
+    else:
+      result = 'for ('
+    self.indent()
+    left = stmt['left']
+    if get_type(left) == 'VariableDeclaration':
+      self.indent()
+      result += left['kind'] + ' '
+      result += self.gen_stmt(left['declarations'][0], S_FFFF)
+      self.dedent()
+    else:
+      result += self.gen_expr(left, PRECEDENCE['Call'], E_TTT)
+    result = join(result, operator)
+    result = join(result, self.gen_expr(stmt['right'],
+                                        PRECEDENCE['Assignment'],
+                                        E_TTT))
+    result += ')'
+    self.dedent()
+    return result + self.maybe_block(stmt['body'], flags)
+
+  def gen_pattern(self, node, prec, flags):
+    if get_type(node) == 'Identifier':
+      return node['name']
+    return self.gen_expr(node, prec, flags)
+
+  def gen_property_key(self, expr, computed):
+    key = self.gen_expr(expr, PRECEDENCE['Assignment'], E_TTT)
+    if computed:
+      return '[' + key + ']'
+    return key
+
+  def gen_stmt(self, stmt, flags):
+    gen = self._stmt_gens[get_type(stmt)]
+    return gen(stmt, flags)
+
+  def generate(self, node):
+    self._base = ''
+    if get_type(node) in self._stmt_gens:
+      return self.gen_stmt(node, S_TFFF)
+    return self.gen_expr(node, PRECEDENCE['Sequence'], E_TTT)
+
+  def identifier(self, expr, prec, flags):
+    return expr['name']
+
+  def if_stmt(self, stmt, flags):
+    self.indent()
+    test = self.gen_expr(stmt['test'], PRECEDENCE['Sequence'], E_TTT)
+    self.dedent()
+    result = 'if (' + test + ')'
+
+    body_flags = S_TFFF
+    if flags & F_SEMICOLON_OPT:
+      body_flags |= F_SEMICOLON_OPT
+
+    consequent = stmt['consequent']
+    alternate = stmt.get('alternate')
+    if alternate:
+      result += self.maybe_block(consequent, S_TFFF)
+      result = self.maybe_block_suffix(consequent, result)
+      if get_type(alternate) == 'IfStatement':
+        alternate = 'else ' + self.gen_stmt(alternate, body_flags)
+      else:
+        alternate = join('else',
+                         self.maybe_block(alternate, body_flags))
+      return join(result, alternate)
+    return result + self.maybe_block(consequent, body_flags)
+
+  def import_callee(self, expr, prec, flags):
+    return 'import'
+
+  def import_decl(self, stmt, flags):
+    source = self.gen_expr(stmt['source'],
+                           PRECEDENCE['Sequence'], E_TTT)
+    specs = stmt['specifiers']
+    if len(specs) == 0:
+      return 'import ' + source + ';'
+
+    result = 'import'
+    cursor = 0
+    if get_type(specs[0]) == 'ImportDefaultSpecifier':
+      result = join(result,
+                    self.gen_expr(specs[0],
+                                  PRECEDENCE['Sequence'], E_TTT))
+      cursor += 1
+
+    if cursor < len(specs):
+      if cursor != 0:
+        result += ','
+
+      if get_type(specs[cursor]) == 'ImportNamespaceSpecifier':
+        result = join(result,
+                      ' ' + self.gen_expr(specs[cursor],
+                                          PRECEDENCE['Sequence'],
+                                          E_TTT))
+      elif len(specs) - cursor == 1:
+        result += ' { '
+        result += self.gen_expr(specs[cursor],
+                                PRECEDENCE['Sequence'], E_TTT)
+        result += ' } '
+      else:
+        result += ' {\n'
+        base = self.indent()
+        for idx in range(cursor, len(specs)):
+          result += base
+          result += self.gen_expr(specs[idx],
+                                  PRECEDENCE['Sequence'], E_TTT)
+          if idx + 1 < len(specs):
+            result += ',\n'
+        self.dedent()
+        if not ends_with_line_terminator(result):
+          result += '\n'
+        result += self._base + '} '
+
+    return join(result, 'from ' + source + ';')
+
+  def import_default_spec(self, expr, prec, flags):
+    local = expr.get('id') or expr['local']
+    return local['name']
+
+  def import_namespace_spec(self, expr, prec, flags):
+    local = expr.get('id') or expr.get('local')
+    if local:
+      return '* as ' + local['name']
+    return '*'
+
+  def import_spec(self, expr, prec, flags):
+    imported = expr['imported']
+    result = imported['name']
+    local = expr.get('local')
+    if local and local['name'] != imported['name']:
+      result += ' as ' + local['name']
+    return result
+
+  def indent(self):
+    self._base += INDENT
+    return self._base
+
+  def labeled_stmt(self, stmt, flags):
+    body_flags = S_TFFT if flags & F_SEMICOLON_OPT else S_TFFF
+    return (stmt['label']['name'] + ':' +
+            self.maybe_block(stmt['body'], body_flags))
+
+  def literal(self, expr, prec, flags):
+    regex = expr.get('regex')
+    if regex:
+      return '/' + regex['pattern'] + '/' + regex['flags']
+
+    value = expr['value']
+    key = (type(value), value)
+    if key in self._memo:
+      return self._memo[key]
+
+    code = gen_literal(value)
+    if len(self._memo) < MEMO_SIZE:
+      self._memo[key] = code
+    return code
+
+  def maybe_block(self, stmt, flags):
+    stmt_type = get_type(stmt)
+    if stmt_type == 'BlockStatement':
+      return ' ' + self.gen_stmt(stmt, flags)
+    if stmt_type == 'EmptyStatement':
+      return ';'
+
+    base = self.indent()
+    result = '\n' + base + self.gen_stmt(stmt, flags)
+    self.dedent()
+    return result
+
+  def maybe_block_suffix(self, stmt, result):
+    ends = ends_with_line_terminator(result)
+    if get_type(stmt) == 'BlockStatement' and not ends:
+      return result + ' '
+    if ends:
+      return result + self._base
+    return result + '\n' + self._base
+
+  def member_expr(self, expr, prec, flags):
+    if flags & F_ALLOW_CALL:
+      obj_flags, prop_flags = E_TTF, E_TTT
+    else:
+      obj_flags, prop_flags = E_TFF, E_TFT
+    obj = expr['object']
+    result = self.gen_expr(obj, PRECEDENCE['Call'], obj_flags)
+
+    if expr.get('computed'):
+      result += '[' + self.gen_expr(expr['property'],
+                                    PRECEDENCE['Sequence'],
+                                    prop_flags) + ']'
+    else:
+      # `1.toString()` is a syntax error
+      if (get_type(obj) == 'Literal' and
+          is_number(obj.get('value')) and
+          '.' not in result and
+          not re.search('[eExX]', result) and
+          result[-1].isdigit() and
+          not (len(result) >= 2 and result[0] == '0')):
+        result += ' '
+      result += '.' + expr['property']['name']
+    return parenthesize(result, PRECEDENCE['Member'], prec)
+
+  def meta_property(self, expr, prec, flags):
+    meta = expr['meta']
+    if type(meta) != str:
+      meta = meta['name']
+    prop = expr['property']
+    if type(prop) != str:
+      prop = prop['name']
+    return parenthesize(meta + '.' + prop, PRECEDENCE['Member'], prec)
+
+  def method_def(self, expr, prec, flags):
+    result = 'static ' if expr.get('static') else ''
+    key = self.gen_property_key(expr['key'], expr.get('computed'))
+    body = self.gen_func_body(expr['value'])
+    if expr.get('kind') in ['get', 'set']:
+      frag = join(expr['kind'], key) + body
+    else:
+      frag = gen_method_prefix(expr) + key + body
+    return join(result, frag)
+
+  def new_expr(self, expr, prec, flags):
+    result = join('new', self.gen_expr(expr['callee'],
+                                       PRECEDENCE['New'], E_TFF))
+    result += '(' + self.gen_args(expr['arguments']) + ')'
+    return parenthesize(result, PRECEDENCE['New'], prec)
+
+  def object_expr(self, expr, prec, flags):
+    props = expr['properties']
+    if len(props) == 0:
+      return '{}'
+
+    multiline = len(props) > 1
+    self.indent()
+    frag = self.gen_expr(props[0], PRECEDENCE['Sequence'], E_TTT)
+    self.dedent()
+    if not multiline and not has_line_terminator(frag):
+      return '{ ' + frag + ' }'
+
+    base = self.indent()
+    result = '{\n' + base + frag
+    if multiline:
+      result += ',\n'
+      for idx in range(1, len(props)):
+        result += base
+        result += self.gen_expr(props[idx],
+                                PRECEDENCE['Sequence'], E_TTT)
+        if idx + 1 < len(props):
+          result += ',\n'
+    self.dedent()
+
+    if not ends_with_line_terminator(result):
+      result += '\n'
+    return result + self._base + '}'
+
+  def object_pattern(self, expr, prec, flags):
+    props = expr['properties']
+    if len(props) == 0:
+      return '{}'
+
+    multiline = False
+    if len(props) == 1:
+      prop = props[0]
+      if (get_type(prop) == 'Property' and
+          get_type(prop['value']) != 'Identifier'):
+        multiline = True
+    else:
+      for prop in props:
+        if (get_type(prop) == 'Property' and
+            not prop.get('shorthand')):
+          multiline = True
+          break
+
+    result = '{\n' if multiline else '{'
+    base = self.indent()
+    for idx, prop in enumerate(props):
+      if multiline:
+        result += base
+      result += self.gen_expr(prop, PRECEDENCE['Sequence'], E_TTT)
+      if idx + 1 < len(props):
+        result += ',\n' if multiline else ', '
+    self.dedent()
+
+    if multiline:
+      if not ends_with_line_terminator(result):
+        result += '\n'
+      result += self._base
+    return result + '}'
+
+  def program(self, stmt, flags):
+    result = ''
+    body = stmt['body']
+    body_flags = S_TFTF
+    for idx, child in enumerate(body):
+      if idx == len(body) - 1:
+        body_flags |= F_SEMICOLON_OPT
+      frag = self._base + self.gen_stmt(child, body_flags)
+      result += frag
+      if (idx + 1 < len(body) and
+          not ends_with_line_terminator(frag)):
+        result += '\n'
+    return result
+
+  def property(self, expr, prec, flags):
+    key = expr['key']
+    computed = expr.get('computed')
+    kind = expr.get('kind')
+    if kind in ['get', 'set']:
+      return (kind + ' ' + self.gen_property_key(key, computed) +
+              self.gen_func_body(expr['value']))
+
+    if expr.get('shorthand'):
+      if get_type(expr['value']) == 'AssignmentPattern':
+        return self.assign_pattern(expr['value'],
+                                   PRECEDENCE['Sequence'], E_TTT)
+      return self.gen_property_key(key, computed)
+
+    if expr.get('method'):
+      return (gen_method_prefix(expr) +
+              self.gen_property_key(key, computed) +
+              self.gen_func_body(expr['value']))
+
+    return (self.gen_property_key(key, computed) + ': ' +
+            self.gen_expr(expr['value'], PRECEDENCE['Assignment'],
+                          E_TTT))
+
+  def rest_elem(self, expr, prec, flags):
+    # escodegen passes neither a precedence nor flags here
+    return '...' + self.gen_pattern(expr['argument'],
+                                    PRECEDENCE['Sequence'], 0)
+
+  def return_stmt(self, stmt, flags):
+    if stmt.get('argument'):
+      arg = self.gen_expr(stmt['argument'],
+                          PRECEDENCE['Sequence'], E_TTT)
+      return join('return', arg) + ';'
+    return 'return;'
+
+  def seq_expr(self, expr, prec, flags):
+    if PRECEDENCE['Sequence'] < prec:
+      flags |= F_ALLOW_IN
+    exprs = [self.gen_expr(child, PRECEDENCE['Assignment'], flags)
+             for child in expr['expressions']]
+    return parenthesize(', '.join(exprs), PRECEDENCE['Sequence'], prec)
+
+  def spread_elem(self, expr, prec, flags):
+    return '...' + self.gen_expr(expr['argument'],
+                                 PRECEDENCE['Assignment'], E_TTT)
+
+  def super_expr(self, expr, prec, flags):
+    return 'super'
+
+  def switch_case(self, stmt, flags):
+    base = self.indent()
+    if stmt.get('test'):
+      test = self.gen_expr(stmt['test'], PRECEDENCE['Sequence'], E_TTT)
+      result = join('case', test) + ':'
+    else:
+      result = 'default:'
+
+    consequent = stmt['consequent']
+    idx = 0
+    if (len(consequent) > 0 and
+        get_type(consequent[0]) == 'BlockStatement'):
+      result += self.maybe_block(consequent[0], S_TFFF)
+      idx = 1
+
+    if (idx != len(consequent) and
+        not ends_with_line_terminator(result)):
+      result += '\n'
+
+    body_flags = S_TFFF
+    while idx < len(consequent):
+      if idx == len(consequent) - 1 and flags & F_SEMICOLON_OPT:
+        body_flags |= F_SEMICOLON_OPT
+      frag = base + self.gen_stmt(consequent[idx], body_flags)
+      result += frag
+      if (idx + 1 != len(consequent) and
+          not ends_with_line_terminator(frag)):
+        result += '\n'
+      idx += 1
+    self.dedent()
+    return result
+
+  def switch_stmt(self, stmt, flags):
+    self.indent()
+    disc = self.gen_expr(stmt['discriminant'],
+                         PRECEDENCE['Sequence'], E_TTT)
+    self.dedent()
+    result = 'switch (' + disc + ') {\n'
+
+    cases = stmt.get('cases') or []
+    body_flags = S_TFFF
+    for idx, case in enumerate(cases):
+      if idx == len(cases) - 1:
+        body_flags |= F_SEMICOLON_OPT
+      frag = self._base + self.gen_stmt(case, body_flags)
+      result += frag
+      if not ends_with_line_terminator(frag):
+        result += '\n'
+    return result + self._base + '}'
+
+  def tagged_template_expr(self, expr, prec, flags):
+    tag_flags = E_TTF if flags & F_ALLOW_CALL else E_TFF
+    result = (self.gen_expr(expr['tag'], PRECEDENCE['Call'],
+                            tag_flags) +
+              self.gen_expr(expr['quasi'], PRECEDENCE['Primary'],
+                            E_FFT))
+    return parenthesize(result, PRECEDENCE['TaggedTemplate'], prec)
+
+  def template_elem(self, expr, prec, flags):
+    return expr['value']['raw']
+
+  def template_literal(self, expr, prec, flags):
+    result = '`'
+    quasis = expr['quasis']
+    exprs = expr['expressions']
+    for idx, quasi in enumerate(quasis):
+      result += self.gen_expr(quasi, PRECEDENCE['Primary'], E_TTT)
+      if idx + 1 < len(quasis):
+        result += '${ ' + self.gen_expr(exprs[idx],
+                                        PRECEDENCE['Sequence'],
+                                        E_TTT) + ' }'
+    return result + '`'
+
+  def this_expr(self, expr, prec, flags):
+    return 'this'
+
+  def throw_stmt(self, stmt, flags):
+    arg = self.gen_expr(stmt['argument'], PRECEDENCE['Sequence'], E_TTT)
+    return join('throw', arg) + ';'
+
+  def try_stmt(self, stmt, flags):
+    block = stmt['block']
+    result = 'try' + self.maybe_block(block, S_TFFF)
+    result = self.maybe_block_suffix(block, result)
+
+    handler = stmt.get('handler')
+    finalizer = stmt.get('finalizer')
+    if handler:
+      result = join(result, self.gen_stmt(handler, S_TFFF))
+      if finalizer:
+        result = self.maybe_block_suffix(handler['body'], result)
+    if finalizer:
+      result = join(result,
+                    'finally' + self.maybe_block(finalizer, S_TFFF))
+    return result
+
+  def unary_expr(self, expr, prec, flags):
+    operator = expr['operator']
+    arg = self.gen_expr(expr['argument'], PRECEDENCE['Unary'], E_TTT)
+    if len(operator) > 2:
+      result = join(operator, arg)
+    elif (operator[-1] in '+-' and operator[-1] == arg[0] or
+          (is_identifier_part(operator[-1]) and
+           is_identifier_part(arg[0]))):
+      result = operator + ' ' + arg
+    else:
+      result = operator + arg
+    return parenthesize(result, PRECEDENCE['Unary'], prec)
+
+  def update_expr(self, expr, prec, flags):
+    if expr.get('prefix'):
+      result = expr['operator'] + self.gen_expr(expr['argument'],
+                                                PRECEDENCE['Unary'],
+                                                E_TTT)
+      return parenthesize(result, PRECEDENCE['Unary'], prec)
+    result = self.gen_expr(expr['argument'],
+                           PRECEDENCE['Postfix'], E_TTT)
+    result += expr['operator']
+    return parenthesize(result, PRECEDENCE['Postfix'], prec)
+
+  def var_decl(self, stmt, flags):
+    body_flags = S_TFFF if flags & F_ALLOW_IN else S_FFFF
+    decls = stmt['declarations']
+    # Multiple declarators are generated one level deeper
+    if len(decls) > 1:
+      self.indent()
+    decls = [self.gen_stmt(decl, body_flags) for decl in decls]
+    if len(decls) > 1:
+      self.dedent()
+    return stmt['kind'] + ' ' + ', '.join(decls) + ';'
+
+  def var_declarator(self, stmt, flags):
+    item_flags = E_TTT if flags & F_ALLOW_IN else E_FTT
+    if stmt.get('init'):
+      return (self.gen_expr(stmt['id'], PRECEDENCE['Assignment'],
+                            item_flags) + ' = ' +
+              self.gen_expr(stmt['init'], PRECEDENCE['Assignment'],
+                            item_flags))
+    return self.gen_pattern(stmt['id'], PRECEDENCE['Assignment'],
+                            item_flags)
+
+  def while_stmt(self, stmt, flags):
+    self.indent()
+    test = self.gen_expr(stmt['test'], PRECEDENCE['Sequence'], E_TTT)
+    self.dedent()
+    body_flags = S_TFFT if flags & F_SEMICOLON_OPT else S_TFFF
+    return ('while (' + test + ')' +
+            self.maybe_block(stmt['body'], body_flags))
+
+  def with_stmt(self, stmt, flags):
+    self.indent()
+    obj = self.gen_expr(stmt['object'], PRECEDENCE['Sequence'], E_TTT)
+    self.dedent()
+    body_flags = S_TFFT if flags & F_SEMICOLON_OPT else S_TFFF
+    return ('with (' + obj + ')' +
+            self.maybe_block(stmt['body'], body_flags))
+
+  def yield_expr(self, expr, prec, flags):
+    result = 'yield*' if expr.get('delegate') else 'yield'
+    if expr.get('argument'):
+      result = join(result, self.gen_expr(expr['argument'],
+                                          PRECEDENCE['Yield'], E_TTT))
+    return parenthesize(result, PRECEDENCE['Yield'], prec)
+
+def ends_with_line_terminator(code):
+  return len(code) > 0 and code[-1] in LINE_TERMINATORS
+
+def escape_allowed_char(code, next_code):
+  if code == 0x08:
+    return '\\b'
+  elif code == 0x0C:
+    return '\\f'
+  elif code == 0x09:
+    return '\\t'
+  elif code > 0xFF:
+    return '\\u%04X' % code
+  elif code == 0 and not 0x30 <= next_code <= 0x39:
+    return '\\0'
+  elif code == 0x0B:
+    return '\\x0B'
+  else:
+    return '\\x%02X' % code
+
+def escape_string(value):
+  if PLAIN_STRING.match(value):
+    return "'" + value + "'"
+
+  # Escape UTF-16 code units like JS does
+  codes = []
+  for char in value:
+    code = ord(char)
+    if code > 0xFFFF:
+      code -= 0x10000
+      codes.append(0xD800 + (code >> 10))
+      codes.append(0xDC00 + (code & 0x3FF))
+    else:
+      codes.append(code)
+  codes.append(-1)
+
+  result = ''
+  for idx in range(len(codes) - 1):
+    code = codes[idx]
+    if code == 0x5C:
+      result += '\\\\'
+    elif code == 0x0A:
+      result += '\\n'
+    elif code == 0x0D:
+      result += '\\r'
+    elif code == 0x2028 or code == 0x2029:
+      result += '\\u%04X' % code
+    elif ((code < 0x20 or code > 0x7E) and
+          not is_identifier_part(chr(code))):
+      result += escape_allowed_char(code, codes[idx + 1])
+    else:
+      result += chr(code)
+  return "'" + result.replace("'", "\\'") + "'"
+
+def gen_async_prefix(node):
+  return 'async ' if node.get('async') else ''
+
+def gen_literal(value):
+  if value is None:
+    return 'null'
+  elif type(value) == str:
+    return escape_string(value)
+  elif type(value) == bool:
+    return 'true' if value else 'false'
+  elif is_number(value):
+    return gen_number(value)
+  raise ValueError('Unknown literal value: %r' % (value,))
+
+def gen_method_prefix(prop):
+  func = prop['value']
+  prefix = ''
+  if func.get('async'):
+    prefix += 'async '
+  if func.get('generator'):
+    prefix += '*'
+  return prefix
+
+def gen_number(value):
+  # Number.prototype.toString() of a non-negative number
+  if type(value) == int and value < 1 << 53:
+    if value < 0:
+      raise ValueError('Numeric literal whose value is negative')
+    return str(value)
+
+  try:
+    value = float(value)
+  except OverflowError:
+    return '1e+400'
+  if math.isnan(value):
+    raise ValueError('Numeric literal whose value is NaN')
+  if value < 0 or math.copysign(1, value) < 0:
+    raise ValueError('Numeric literal whose value is negative')
+  if math.isinf(value):
+    return '1e+400'
+  if value == 0:
+    return '0'
+
+  # Shortest round-trip digits and the position of the decimal point
+  mantissa, _, exp = repr(value).partition('e')
+  int_part, _, frac_part = mantissa.partition('.')
+  digits = int_part + frac_part
+  point = len(int_part) + int(exp or 0)
+  stripped = digits.lstrip('0')
+  point -= len(digits) - len(stripped)
+  digits = stripped.rstrip('0')
+
+  num_digits = len(digits)
+  if num_digits <= point <= 21:
+    return digits + '0' * (point - num_digits)
+  elif 0 < point <= 21:
+    return digits[:point] + '.' + digits[point:]
+  elif -6 < point <= 0:
+    return '0.' + '0' * -point + digits
+
+  exp = point - 1
+  exp = 'e+%d' % exp if exp >= 0 else 'e-%d' % -exp
+  if num_digits == 1:
+    return digits + exp
+  return digits[0] + '.' + digits[1:] + exp
+
+def gen_star_suffix(node):
+  return '* ' if node.get('generator') else ''
+
+def get_type(node):
+  return node['type']
+
+def has_line_terminator(code):
+  return '\n' in code or '\r' in code
+
+def is_async_prefixed(code):
+  if code[:5] != 'async' or len(code) < 6 or code[5] not in WHITE_SPACES:
+    return False
+  rest = code[6:].lstrip(''.join(WHITE_SPACES))
+  return is_function_prefixed(rest)
+
+def is_class_prefixed(code):
+  if code[:5] != 'class' or len(code) < 6:
+    return False
+  return (code[5] == '{' or
+          code[5] in WHITE_SPACES or
+          code[5] in LINE_TERMINATORS)
+
+def is_function_prefixed(code):
+  if code[:8] != 'function' or len(code) < 9:
+    return False
+  return (code[8] in '(*' or
+          code[8] in WHITE_SPACES or
+          code[8] in LINE_TERMINATORS)
+
+def is_identifier_part(char):
+  # IdentifierPart of ES5 on a UTF-16 code unit
+  if char < '\x80':
+    return char in ID_PART_ASCII
+  elif char > '\uffff':
+    return False
+  elif char == '\u200c' or char == '\u200d':
+    return True
+  return unicodedata.category(char) in ID_PART_CATEGORIES
+
+def is_number(value):
+  return type(value) in [int, float]
+
+def join(left, right):
+  if len(left) == 0:
+    return right
+  elif len(right) == 0:
+    return left
+
+  left_char = left[-1]
+  right_char = right[0]
+  if ((left_char in '+-' and left_char == right_char) or
+      (is_identifier_part(left_char) and
+       is_identifier_part(right_char)) or
+      (left_char == '/' and right_char == 'i')):
+    return left + ' ' + right
+  elif (left_char in WHITE_SPACES or
+        left_char in LINE_TERMINATORS or
+        right_char in WHITE_SPACES or
+        right_char in LINE_TERMINATORS):
+    return left + right
+  return left + ' ' + right
+
+def parenthesize(code, cur_prec, prec):
+  if cur_prec < prec:
+    return '(' + code + ')'
+  return code
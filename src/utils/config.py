@@ -9,12 +9,22 @@ class Config:
     self.batch_size = conf['model']['batch_size']
     self.bug_dir = conf['bug_dir']
     self.data_dir = conf['data_dir']
+    self.device = conf.get('device', 'cuda')
     self.emb_size = conf['model']['emb_size']
     self.eng_name = conf['eng_name']
     self.eng_path = conf['eng_path']
     self.epoch = conf['model']['epoch']
+    self.exec_mode = conf.get('exec_mode', 'process')
+    self.exec_queue_size = conf.get('exec_queue_size', 16)
+    self.exec_threads = conf.get('exec_threads', 0)
     self.gamma = conf['model']['gamma']
+    self.hash_mode = conf.get('hash_mode', 'fast')
+    self.hidden_cache_size = conf.get('hidden_cache_size', 16384)
+    self.infer_batch_size = conf.get('infer_batch_size', 64)
+    self.infer_max_wait = conf.get('infer_max_wait', 0.005)
+    self.infer_server = conf.get('infer_server', False)
     self.lr = conf['model']['lr']
+    self.max_backtracks = conf.get('max_backtracks', 4)
     self.max_ins = conf['max_ins']
     self.model_path = conf['model_path']
     self.momentum = conf['model']['momentum']
@@ -22,12 +32,26 @@ class Config:
     self.weight_decay = conf['model']['weight_decay']
     self.num_gpu = conf['num_gpu']
     self.num_proc = conf['num_proc']
+    self.num_threads = conf.get('num_threads', 1)
     self.opt = conf['opt']
+    self.printer = conf.get('printer', 'node')
+    self.resolve_max_time = conf.get('resolve_max_time', 1.0)
+    self.resolve_max_visits = conf.get('resolve_max_visits', 100000)
+    self.resolve_mode = conf.get('resolve_mode', 'full')
+    self.resolve_overrun = conf.get('resolve_overrun', 'partial')
+    self.sample_ring = conf.get('sample_ring', 0)
+    self.scratch_dir = conf.get('scratch_dir', None)
+    self.seed_cache_mb = conf.get('seed_cache_mb', 64)
     self.seed_dir = conf['seed_dir']
+    self.start_mode = conf.get('start_mode', 'spawn')
+    self.stat_interval = conf.get('stat_interval', 60)
     self.timeout = conf['timeout']
     self.top_k = conf['top_k']
 
     self.ast_dir = os.path.join(self.data_dir, 'ast')
+    self.builtin_dir = os.path.join(self.data_dir, 'builtins')
+    self.harness_dir = os.path.join(self.data_dir, 'harness')
+    self.harness_path = os.path.join(self.harness_dir, 'index.bin')
     self.log_dir = os.path.join(self.data_dir, 'log')
 
   def load_conf(self, conf_path):
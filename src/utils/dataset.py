@@ -0,0 +1,207 @@
+import json
+import os
+from array import array
+
+from utils import get_node_type
+from utils import make_dir
+from utils.store import LazyList
+from utils.store import Store
+from utils.store import pack_frags
+from utils.store import pack_seqs
+from utils.store import write_store
+
+DATASET_DIR = 'dataset'
+DATASET_VERSION = 1
+MANIFEST = 'manifest.json'
+
+# Component name and file
+COMPONENTS = {
+  'frags': 'frags.bin',
+  'frag_info': 'frag_info.bin',
+  'new_seeds': 'new_seeds.bin',
+  'oov': 'oov.bin',
+  'seeds': 'seeds.bin',
+  'types': 'types.json',
+  'vocab': 'vocab.bin',
+}
+
+class SeedDict:
+  # Read-only view of a seed dict whose sequences are in a store
+  def __init__(self, seed_names, store):
+    self._seed_names = seed_names
+    self._seed_idx = {seed_name: idx
+                      for idx, seed_name in enumerate(seed_names)}
+    self._store = store
+
+  def __getitem__(self, seed_name):
+    seed_idx = self._seed_idx[seed_name]
+    return self._store.item('seqs', seed_idx).tolist(), None
+
+  def __len__(self):
+    return len(self._seed_names)
+
+  def keys(self):
+    return self._seed_names
+
+class Dataset:
+  def __init__(self, data_dir):
+    self._dataset_dir = os.path.join(data_dir, DATASET_DIR)
+    manifest_path = os.path.join(self._dataset_dir, MANIFEST)
+    if not os.path.exists(manifest_path):
+      raise FileNotFoundError('No dataset in %s, run preprocess first'
+                              % data_dir)
+    with open(manifest_path) as f:
+      manifest = json.load(f)
+    if manifest['version'] != DATASET_VERSION:
+      msg = 'Dataset version %d is not supported, run preprocess again'
+      raise ValueError(msg % manifest['version'])
+
+    self._components = manifest['components']
+    self._stores = {}
+    self._frag_list = None
+
+  def closers(self):
+    # Datasets written before closers were added have none
+    return self.load('vocab').meta.get('closers', {})
+
+  def frag_list(self):
+    # Shared by the vocabulary and the OoV pools
+    if self._frag_list is None:
+      store = self.load('frags')
+      load = lambda idx: store.frag('frags', idx)
+      self._frag_list = LazyList(store.num_items('frags'), load)
+    return self._frag_list
+
+  def load(self, name):
+    # Each component is opened on first use
+    if name not in self._stores:
+      path = os.path.join(self._dataset_dir, self._components[name])
+      if path.endswith('.json'):
+        with open(path) as f:
+          self._stores[name] = json.load(f)
+      else:
+        self._stores[name] = Store(path)
+    return self._stores[name]
+
+  def new_frag_list(self):
+    # OoV entries are stored as -1 - (index of the OoV type)
+    store = self.load('vocab')
+    vocab, oov_types = store.get('vocab'), store.meta['oov_types']
+    frag_list = self.frag_list()
+
+    def load(new_idx):
+      frag_idx = vocab[new_idx]
+      if frag_idx < 0:
+        return oov_types[-1 - frag_idx]
+      return frag_list[frag_idx]
+    return LazyList(len(vocab), load)
+
+  def new_frag_types(self):
+    return self.load('vocab').meta['types']
+
+  def new_seed_dict(self):
+    seed_names = self.load('seeds').meta['seed_names']
+    return SeedDict(seed_names, self.load('new_seeds'))
+
+  def oov_pool(self):
+    store = self.load('oov')
+    frag_list = self.frag_list()
+    oov_pool = {}
+    for idx, oov_type in enumerate(store.meta['oov_types']):
+      frag_ids = store.item('pool', idx)
+      load = lambda k, frag_ids=frag_ids: frag_list[frag_ids[k]]
+      oov_pool[oov_type] = LazyList(len(frag_ids), load)
+    return oov_pool
+
+  def seed_dict(self):
+    store = self.load('seeds')
+    return SeedDict(store.meta['seed_names'], store)
+
+  def train_seqs(self):
+    # OoV fragment sequence and (parent sequence, type sequence)
+    # of each seed
+    new_seeds = self.load('new_seeds')
+    frag_info = self.load('frag_info')
+    train_seqs = []
+    for seed_idx in range(new_seeds.num_items('seqs')):
+      frag_seq = new_seeds.item('seqs', seed_idx).tolist()
+      parents = frag_info.item('parents', seed_idx).tolist()
+      types = frag_info.item('types', seed_idx).tolist()
+      train_seqs += [(frag_seq, (parents, types))]
+    return train_seqs
+
+  def type_dict(self):
+    type_list = self.type_list()
+    return {node_type: idx for idx, node_type in enumerate(type_list)}
+
+  def type_list(self):
+    return self.load('types')['type_list']
+
+def get_frag_types(new_frag_list):
+  # Node type of each fragment, or the type of an OoV fragment
+  return [get_node_type(frag) if type(frag) == dict else frag
+          for frag in new_frag_list]
+
+def write_dataset(data_dir, seed_dict, frag_list, new_seed_dict,
+                  new_frag_list, oov_pool, type_list, closers):
+  dataset_dir = os.path.join(data_dir, DATASET_DIR)
+  make_dir(dataset_dir)
+  paths = {name: os.path.join(dataset_dir, file_name)
+           for name, file_name in COMPONENTS.items()}
+
+  # The vocabulary and the OoV pools refer to frag_list
+  frag_ids = {id(frag): idx for idx, frag in enumerate(frag_list)}
+  oov_types = sorted(oov_pool.keys())
+
+  offsets, frags = pack_frags(frag_list)
+  sections = {'frags': frags, 'frags_offsets': offsets}
+  write_store(paths['frags'], sections, {})
+
+  vocab = array('i')
+  for frag in new_frag_list:
+    if type(frag) == dict:
+      vocab.append(frag_ids[id(frag)])
+    else:
+      vocab.append(-1 - oov_types.index(frag))
+  meta = {'closers': closers,
+          'oov_types': oov_types,
+          'types': get_frag_types(new_frag_list)}
+  write_store(paths['vocab'], {'vocab': vocab}, meta)
+
+  offsets, pool = pack_seqs([[frag_ids[id(frag)]
+                              for frag in oov_pool[oov_type]]
+                             for oov_type in oov_types])
+  sections = {'pool': pool, 'pool_offsets': offsets}
+  write_store(paths['oov'], sections, {'oov_types': oov_types})
+
+  # Sequences of every seed are in the order of seed_names
+  seed_names = list(seed_dict.keys())
+  offsets, seqs = pack_seqs([seed_dict[seed_name][0]
+                             for seed_name in seed_names])
+  sections = {'seqs': seqs, 'seqs_offsets': offsets}
+  write_store(paths['seeds'], sections, {'seed_names': seed_names})
+
+  new_seqs = [new_seed_dict[seed_name] for seed_name in seed_names]
+  offsets, seqs = pack_seqs([frag_seq for frag_seq, _ in new_seqs])
+  sections = {'seqs': seqs, 'seqs_offsets': offsets}
+  write_store(paths['new_seeds'], sections, {})
+
+  frag_info = [list(zip(*frag_info_seq)) or [(), ()]
+               for _, frag_info_seq in new_seqs]
+  parent_offsets, parents = pack_seqs([p for p, _ in frag_info])
+  type_offsets, types = pack_seqs([t for _, t in frag_info])
+  sections = {'parents': parents, 'parents_offsets': parent_offsets,
+              'types': types, 'types_offsets': type_offsets}
+  write_store(paths['frag_info'], sections, {})
+
+  with open(paths['types'], 'w') as f:
+    json.dump({'type_list': type_list}, f)
+
+  # The manifest is written last, so that a partial dataset is
+  # never loaded
+  manifest = {'version': DATASET_VERSION, 'components': COMPONENTS,
+              'num_frags': len(frag_list),
+              'num_seeds': len(seed_names),
+              'vocab_size': len(new_frag_list)}
+  with open(os.path.join(dataset_dir, MANIFEST), 'w') as f:
+    json.dump(manifest, f, indent=2)
@@ -1,53 +1,101 @@
 import os
 
-from utils import list_dir
-
-class Harness:
-  def __init__(self, seed_dir):
-    self._seed_dir = seed_dir
-    self._harness_dict = {}
-    self.build_dict()
-
-  def build_dict(self):
-    js_list = list_dir(self._seed_dir)
-
-    for js_path in js_list:
-      with open(js_path, 'r') as f:
-        js_name = os.path.basename(js_path)
-        for line in f:
-          line = line.strip()
-          if not self.is_load(line):
-            continue
-
-          harness = self.get_harness(line)
-          if not harness.endswith('.js'):
-            continue
-
-          if js_name not in self._harness_dict:
-            self._harness_dict[js_name] = []
-          self._harness_dict[js_name] += [harness]
-
-  def get_keys(self):
-    return self._harness_dict.keys()
-
-  def get_harness(self, line):
-    if line.startswith('load("'):
-      delimiter = '"'
-    elif line.startswith('load(\''):
-      delimiter = '\''
-    return self.extract_path(line, delimiter)
+from utils.store import Store
+from utils.store import pack_seqs
+from utils.store import write_store
+
+class HarnessIndex:
+  def __init__(self, index_path):
+    self._store = Store(index_path)
+    meta = self._store.meta
+    self._harness_names = meta['harness_names']
+    self._id_idx = {name: idx
+                    for idx, name in enumerate(meta['id_names'])}
+    self._seed_idx = {name: idx
+                      for idx, name in enumerate(meta['seed_names'])}
+    self._file_sets = {}
+
+  def get_file_set(self, name):
+    # Used for duplicate checks, so it is built once per identifier
+    file_set = self._file_sets.get(name)
+    if file_set is None:
+      file_set = frozenset(self.get_files(name))
+      self._file_sets[name] = file_set
+    return file_set
+
+  def get_files(self, name):
+    # Harness files that define the identifier
+    id_idx = self._id_idx[name]
+    return [self._harness_names[idx]
+            for idx in self._store.item('id_files', id_idx)]
 
   def get_list(self, seed_name):
-    if seed_name in self._harness_dict:
-      return self._harness_dict[seed_name]
-    else:
+    # A fresh list, since the resolver appends to it
+    if seed_name not in self._seed_idx:
       return []
+    seed_idx = self._seed_idx[seed_name]
+    return [self._harness_names[idx]
+            for idx in self._store.item('seed_files', seed_idx)]
+
+  def has_id(self, name):
+    return name in self._id_idx
+
+def extract_path(line, delimiter):
+  line = line.split(delimiter)
+  load_path = line[1]
+  return os.path.basename(load_path)
+
+def get_harness(line):
+  if line.startswith('load("'):
+    delimiter = '"'
+  elif line.startswith('load(\''):
+    delimiter = '\''
+  return extract_path(line, delimiter)
+
+def is_load(line):
+  return (line.startswith('load("') or
+          line.startswith('load(\''))
+
+def scan_loads(js_path):
+  # Harness files loaded by a seed
+  harness_list = []
+  with open(js_path, 'r') as f:
+    for line in f:
+      line = line.strip()
+      if not is_load(line):
+        continue
+
+      harness = get_harness(line)
+      if harness.endswith('.js'):
+        harness_list += [harness]
+  return harness_list
+
+def write_index(index_path, id_harness_map, harness_dict):
+  seed_names = sorted(harness_dict.keys())
+  id_names = sorted(id_harness_map.keys())
+
+  harness_names = set()
+  for harness_list in harness_dict.values():
+    harness_names.update(harness_list)
+  for harness_files in id_harness_map.values():
+    harness_names.update(harness_files)
+  harness_names = sorted(harness_names)
+  harness_idx = {name: idx for idx, name in enumerate(harness_names)}
 
-  def extract_path(self, line, delimiter):
-    line = line.split(delimiter)
-    load_path = line[1]
-    return os.path.basename(load_path)
+  # Harness files of each identifier and of each seed
+  offsets, id_files = pack_seqs([[harness_idx[name] for name
+                                  in sorted(id_harness_map[id_name])]
+                                 for id_name in id_names])
+  sections = {'id_files': id_files, 'id_files_offsets': offsets}
+  offsets, seed_files = pack_seqs([[harness_idx[name] for name
+                                    in harness_dict[seed_name]]
+                                   for seed_name in seed_names])
+  sections.update(seed_files=seed_files, seed_files_offsets=offsets)
 
-  def is_load(self, line):
-    return (line.startswith('load("') or
-            line.startswith('load(\''))
+  meta = {'harness_names': harness_names,
+          'id_names': id_names,
+          'seed_names': seed_names}
+  # Running fuzzers keep their mapping of the old index
+  tmp_path = '%s.%d' % (index_path, os.getpid())
+  write_store(tmp_path, sections, meta)
+  os.replace(tmp_path, index_path)
@@ -1,14 +1,16 @@
+import json
 import os
+import shutil
 
 from utils import get_node_type
 from utils import is_node_list
 from utils import is_single_node
 from utils import list_dir
 from utils import load_ast
-from utils import make_dir
+from utils import make_tmp_dir
 from utils import trim_seed_name
-from utils import write
-from utils.harness import Harness
+from utils.harness import scan_loads
+from utils.harness import write_index
 from utils.logger import print_msg
 from utils.node import PROP_DICT
 from utils.node import TERM_TYPE
@@ -49,45 +51,43 @@ def build_def_dict(node, def_dict):
         if _child != None:
           build_def_dict(_child, def_dict)
 
-def build_dict(ast_dir):
+def build_id_map(conf):
+  if not os.path.exists(conf.harness_dir):
+    os.makedirs(conf.harness_dir)
+  records = load_records(conf)
+
+  print_msg('[1/3] Building def dictionary')
+  seed_dir = os.path.join(conf.data_dir, 'seed')
+  records['defs'] = update_defs(conf, seed_dir, records['defs'])
   def_dict = {}
-  ast_list = list_dir(ast_dir)
-  num_ast = len(ast_list)
-  for idx, ast_name in enumerate(ast_list):
-    msg = '[%d/%d] %s' % (idx + 1, num_ast, ast_name)
-    print_msg(msg, 'INFO')
-    js_name, ast = load_ast(ast_name)
+  for js_name, (_, defs) in records['defs'].items():
     js_name = trim_seed_name(js_name)
     if js_name not in def_dict:
       def_dict[js_name] = set()
-    build_def_dict(ast, def_dict[js_name])
-  return def_dict
-
-def build_id_map(conf):
-  print_msg('[1/2] Building def dictionary')
-  ast_dir = parse_seed(conf)
-  def_dict = build_dict(ast_dir)
-
-  print_msg('[2/2] Building ID map')
-  id_harness_map = construct_map(conf, def_dict)
-
-  write_map(id_harness_map)
-
-def construct_map(conf, def_dict):
-  no_err_path = os.path.join(conf.data_dir, 'seed')
-  no_err_list = os.listdir(no_err_path)
-
-  harness = Harness(conf.seed_dir)
-  harness_keys = harness.get_keys()
-  num_files = len(harness_keys)
-
+    def_dict[js_name].update(defs)
+
+  print_msg('[2/3] Scanning harness files')
+  records['loads'] = update_loads(conf.seed_dir, records['loads'])
+  harness_dict = {js_name: harness_list
+                  for js_name, (_, harness_list)
+                  in records['loads'].items()
+                  if len(harness_list) > 0}
+
+  print_msg('[3/3] Building ID map')
+  no_err_list = set(records['defs'].keys())
+  id_harness_map = construct_map(harness_dict, def_dict, no_err_list)
+  write_index(conf.harness_path, id_harness_map, harness_dict)
+  write_records(conf, records)
+
+def construct_map(harness_dict, def_dict, no_err_list):
+  num_files = len(harness_dict)
   id_harness_map = {}
-  for idx, file_name in enumerate(harness_keys):
+  for idx, file_name in enumerate(harness_dict):
     msg = '[%d/%d] %s' % (idx + 1, num_files, file_name)
     print_msg(msg, 'INFO')
 
     if file_name not in no_err_list: continue
-    for harness_file in harness.get_list(file_name):
+    for harness_file in harness_dict[file_name]:
       if harness_file not in def_dict: continue
       for def_name in def_dict[harness_file]:
         if (file_name in def_dict and
@@ -99,18 +99,81 @@ def construct_map(conf, def_dict):
         id_harness_map[def_name].add(harness_file)
   return id_harness_map
 
-def parse_seed(conf):
+def get_stat(js_path):
+  stat = os.stat(js_path)
+  return [stat.st_mtime_ns, stat.st_size]
+
+def load_records(conf):
+  # Per-file results of the last build, keyed by file stats
+  records_path = os.path.join(conf.harness_dir, 'records.json')
+  if not os.path.exists(records_path):
+    return {'defs': {}, 'loads': {}}
+  with open(records_path, 'r') as f:
+    return json.load(f)
+
+def parse_seeds(conf, js_list, ast_dir):
+  # Only the given seeds are linked into a directory to parse
+  tmp_dir = make_tmp_dir(conf.data_dir)
+  for js_path in js_list:
+    js_name = os.path.basename(js_path)
+    os.symlink(os.path.abspath(js_path),
+               os.path.join(tmp_dir, js_name))
   parser = Parser()
-  seed_dir = os.path.join(conf.data_dir, 'seed')
-  ast_dir = os.path.join(conf.data_dir, 'ast_all')
-  make_dir(ast_dir)
-  parser.parse(seed_dir, ast_dir)
-  return ast_dir
+  parser.parse(tmp_dir, ast_dir)
+  shutil.rmtree(tmp_dir)
 
-def write_map(id_harness_map):
-  for key in id_harness_map:
-    id_harness_map[key] = list(id_harness_map[key])
+def remove_ast(ast_dir, js_name):
+  ast_path = os.path.join(ast_dir, js_name[:-3] + '.json')
+  if os.path.exists(ast_path):
+    os.remove(ast_path)
 
-  map_path = 'fuzz/id_map.py'
-  content = 'ID_HARNESS_MAP = {}'.format(id_harness_map)
-  write(map_path, content, 'w')
+def update_defs(conf, seed_dir, records):
+  ast_dir = os.path.join(conf.data_dir, 'ast_all')
+  if not os.path.exists(ast_dir):
+    os.makedirs(ast_dir)
+
+  new_records, changed = {}, []
+  for js_path in list_dir(seed_dir):
+    js_name = os.path.basename(js_path)
+    stat = get_stat(js_path)
+    if js_name in records and records[js_name][0] == stat:
+      new_records[js_name] = records[js_name]
+    else:
+      changed += [(js_name, js_path, stat)]
+
+  # Seeds that are gone leave their ASTs behind
+  for js_name in records:
+    if js_name not in new_records:
+      remove_ast(ast_dir, js_name)
+  for js_name, _, _ in changed:
+    remove_ast(ast_dir, js_name)
+
+  msg = '%d new or modified seeds' % len(changed)
+  print_msg(msg, 'INFO')
+  if len(changed) > 0:
+    parse_seeds(conf, [js_path for _, js_path, _ in changed], ast_dir)
+
+  for js_name, _, stat in changed:
+    defs = set()
+    ast_path = os.path.join(ast_dir, js_name[:-3] + '.json')
+    if os.path.exists(ast_path):
+      _, ast = load_ast(ast_path)
+      build_def_dict(ast, defs)
+    new_records[js_name] = [stat, sorted(defs)]
+  return new_records
+
+def update_loads(seed_dir, records):
+  new_records = {}
+  for js_path in list_dir(seed_dir):
+    js_name = os.path.basename(js_path)
+    stat = get_stat(js_path)
+    if js_name in records and records[js_name][0] == stat:
+      new_records[js_name] = records[js_name]
+    else:
+      new_records[js_name] = [stat, scan_loads(js_path)]
+  return new_records
+
+def write_records(conf, records):
+  records_path = os.path.join(conf.harness_dir, 'records.json')
+  with open(records_path, 'w') as f:
+    json.dump(records, f)
@@ -1,14 +1,15 @@
-import os
+import json
+import struct
 from subprocess import PIPE
 from subprocess import Popen
 
-from utils import hash_frag
-from utils import write_ast
+import ujson
+
+from utils.codegen import CodeGenerator
 
 class CodePrinter:
-  def __init__(self, js_dir):
-    self._js_dir = js_dir
-    cmd = ['node', 'utils/ast2code.js', js_dir]
+  def __init__(self):
+    cmd = ['node', 'utils/ast2code.js']
     self._printer = Popen(cmd, cwd='./', bufsize=0,
                           stdin=PIPE, stdout=PIPE, stderr=PIPE)
 
@@ -16,17 +17,45 @@ class CodePrinter:
     self._printer.terminate()
 
   def ast2code(self, ast):
-    ast_name = hash_frag(ast) + '.json'
-    ast_path = os.path.join(self._js_dir, ast_name)
-    write_ast(ast_path, ast)
+    try:
+      ast = ujson.dumps(ast)
+    except OverflowError:
+      ast = json.dumps(ast, separators=(',', ':'))
+    ast = str.encode(ast)
 
-    ast_path = str.encode(ast_path + '\n')
-    self._printer.stdin.write(ast_path)
-    js_path = self._printer.stdout.readline()
-    js_path = js_path.decode('utf-8').strip()
-    os.remove(ast_path.strip())
+    # Send a length-prefixed AST and read back the code
+    header = struct.pack('>I', len(ast))
+    self._printer.stdin.write(header + ast)
+    status, size = struct.unpack('>BI', self.read(5))
+    code = self.read(size).decode('utf-8')
 
-    if 'Error' in js_path:
+    if status != 0:
       return None
     else:
-      return js_path
+      return code
+
+  def read(self, size):
+    buf = b''
+    while len(buf) < size:
+      chunk = self._printer.stdout.read(size - len(buf))
+      if len(chunk) == 0:
+        raise EOFError('ast2code.js terminated')
+      buf += chunk
+    return buf
+
+class NativePrinter:
+  def __init__(self):
+    # Literals are memoized as they are printed
+    self._codegen = CodeGenerator()
+
+  def ast2code(self, ast):
+    try:
+      return self._codegen.generate(ast)
+    except (KeyError, TypeError, ValueError, RecursionError):
+      return None
+
+def get_printer(printer):
+  if printer == 'native':
+    return NativePrinter()
+  else:
+    return CodePrinter()
@@ -0,0 +1,111 @@
+import json
+import mmap
+import struct
+from array import array
+
+import ujson
+
+STORE_MAGIC = b'MTGSTOR2'
+
+class LazyList:
+  # Decodes each item on first access and keeps it, so that the same
+  # object is returned for the same index. Iteration does not keep
+  # the items.
+  def __init__(self, size, load):
+    self._items = [None] * size
+    self._load = load
+
+  def __getitem__(self, idx):
+    item = self._items[idx]
+    if item is None:
+      item = self._load(idx)
+      self._items[idx] = item
+    return item
+
+  def __iter__(self):
+    for idx, item in enumerate(self._items):
+      yield item if item is not None else self._load(idx)
+
+  def __len__(self):
+    return len(self._items)
+
+class Store:
+  def __init__(self, store_path):
+    with open(store_path, 'rb') as f:
+      self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, meta_size = struct.unpack_from('<8sQ', self._mmap)
+    if magic != STORE_MAGIC:
+      raise ValueError('%s is not a Montage store' % store_path)
+    meta = self._mmap[16:16 + meta_size]
+    self.meta = json.loads(meta.decode('utf-8'))
+
+    # Sections are views on the shared pages
+    view = memoryview(self._mmap)
+    self._sections = {}
+    for name, (start, size, fmt) in self.meta['sections'].items():
+      self._sections[name] = view[start:start + size].cast(fmt)
+
+  def frag(self, name, idx):
+    frag = self.item(name, idx).tobytes()
+    try:
+      return ujson.loads(frag)
+    except ValueError:
+      return json.loads(frag.decode('utf-8', 'surrogatepass'))
+
+  def get(self, name):
+    return self._sections[name]
+
+  def item(self, name, idx):
+    # Variable-length items are indexed by an offset section
+    offsets = self._sections[name + '_offsets']
+    return self._sections[name][offsets[idx]:offsets[idx + 1]]
+
+  def num_items(self, name):
+    return len(self._sections[name + '_offsets']) - 1
+
+def align(size):
+  return (size + 7) & ~7
+
+def encode_frag(frag):
+  try:
+    frag = ujson.dumps(frag, ensure_ascii=False)
+  except OverflowError:
+    frag = json.dumps(frag, ensure_ascii=False,
+                      separators=(',', ':'))
+  return frag.encode('utf-8', 'surrogatepass')
+
+def pack_frags(frag_list):
+  offsets, blobs = array('q', [0]), []
+  for frag in frag_list:
+    blobs += [encode_frag(frag)]
+    offsets.append(offsets[-1] + len(blobs[-1]))
+  return offsets, b''.join(blobs)
+
+def pack_seqs(seq_list):
+  offsets, values = array('q', [0]), array('i')
+  for seq in seq_list:
+    values.extend(seq)
+    offsets.append(len(values))
+  return offsets, values
+
+def write_store(store_path, sections, meta):
+  # Section offsets depend on the size of the metadata, so the
+  # header reserves room for them
+  layout = {name: [0, 0, 'B'] for name in sections}
+  meta = dict(meta, sections=layout)
+  meta_size = len(json.dumps(meta).encode('utf-8'))
+  offset = align(16 + meta_size + 64 * len(sections))
+
+  for name, data in sections.items():
+    size = len(data) * getattr(data, 'itemsize', 1)
+    layout[name] = [offset, size, getattr(data, 'typecode', 'B')]
+    offset = align(offset + size)
+  meta = json.dumps(meta).encode('utf-8')
+
+  with open(store_path, 'wb') as f:
+    f.write(struct.pack('<8sQ', STORE_MAGIC, len(meta)))
+    f.write(meta)
+    for name, data in sections.items():
+      f.seek(layout[name][0])
+      f.write(data)
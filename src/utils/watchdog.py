@@ -0,0 +1,87 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+KILL_GRACE = 1
+
+_watchdog = None
+_watchdog_lock = threading.Lock()
+
+class Watch:
+  def __init__(self, proc):
+    self.proc = proc
+    self.active = True
+    self.timed_out = False
+
+class Watchdog:
+  def __init__(self, grace=KILL_GRACE):
+    self._grace = grace
+    self._cond = threading.Condition()
+    self._heap = []
+    self._seq = itertools.count()
+    self._pid = os.getpid()
+    self.num_timeouts = 0
+
+    thread = threading.Thread(target=self.run)
+    thread.daemon = True
+    thread.start()
+
+  def cancel(self, watch):
+    # Lazily dropped from the heap by the reaper
+    watch.active = False
+
+  def expire(self, watch, stage):
+    proc = watch.proc
+    if proc.poll() is not None:
+      return
+
+    # Escalate SIGTERM to SIGKILL after a grace period
+    if stage == 'term':
+      watch.timed_out = True
+      self.num_timeouts += 1
+      proc.terminate()
+      deadline = time.time() + self._grace
+      self.push(deadline, watch, 'kill')
+    else:
+      proc.kill()
+
+  def push(self, deadline, watch, stage):
+    entry = (deadline, next(self._seq), watch, stage)
+    heapq.heappush(self._heap, entry)
+
+  def run(self):
+    with self._cond:
+      while True:
+        if len(self._heap) == 0:
+          self._cond.wait()
+          continue
+
+        deadline, _, watch, stage = self._heap[0]
+        if not watch.active:
+          heapq.heappop(self._heap)
+          continue
+
+        now = time.time()
+        if now < deadline:
+          self._cond.wait(deadline - now)
+          continue
+
+        heapq.heappop(self._heap)
+        self.expire(watch, stage)
+
+  def watch(self, proc, timeout):
+    watch = Watch(proc)
+    with self._cond:
+      self.push(time.time() + timeout, watch, 'term')
+      self._cond.notify()
+    return watch
+
+def get_watchdog():
+  global _watchdog
+  with _watchdog_lock:
+    # The reaper thread does not survive a fork
+    if _watchdog is None or _watchdog._pid != os.getpid():
+      _watchdog = Watchdog()
+  return _watchdog
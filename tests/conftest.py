@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules of Montage are imported from src, as main.py does
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+                       os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,61 @@
+var a = 1, b = 'two', c = [1, , 3, ...rest], d = {x, y: 2, [k]: 3, 'q': 4, 5: 6};
+let {p, q: {r = 1}} = d;
+const [s, [t], ...u] = c;
+function f(x, y = 2, ...z) {
+  if (x) return y; else if (!z) { return; } else throw new Error('bad');
+}
+function* g() { yield 1; yield* h(); return yield; }
+async function h() { 'use strict'; await f(); for (const x of y) {} }
+var arrow = (x, y) => x + y, single = x => ({x}), body = async () => { await 0; };
+class A extends B {
+  constructor() { super(); this.x = new.target; }
+  static m() { return super.m(); }
+  get v() { return 1; }
+  set v(w) {}
+  *gen() {}
+  async am() {}
+  [key]() {}
+}
+var e = class {};
+label: for (var i = 0, j; i < 10; i++, j--) { if (i) continue label; else break label; }
+for (var k in o) ;
+for (const v of [1, 2]) {}
+for (var x = ('a' in o); x;) {}
+for (;;) { break; }
+while (a) a--;
+do { --a; } while (a > 0);
+switch (a) { case 1: case 2: b = 3; break; default: b = 4; }
+try { f(); } catch (err) { g(); } finally { h(); }
+try {} catch ({message}) {}
+with (o) { p; }
+debugger;
+x = a ? b : c ? d : e;
+x = (a, b, c);
+x = a ** b ** c; x = (a ** b) ** c;
+x = a + b * c - (d - e) / f % g;
+x = (a + b) * c; x = a - (b + c); x = a / (b * c);
+x = a << 1 >> 2 >>> 3 & 4 | 5 ^ 6;
+x = a == b != c === d !== e < f > g <= h >= i instanceof A;
+x = a && b || c && (d || e);
+x = typeof a + void 0 + delete o.p + !a + ~a + -a + +a + - -a + + +a + -(-a) + +(+a);
+x = a++ + ++b - c-- - --d; x = a + +b; x = a - -b; x = a+ ++b; x = a- --b;
+x += 1; x -= 1; x *= 2; x /= 2; x %= 2; x **= 2; x <<= 1; x >>= 1; x >>>= 1; x &= 1; x |= 1; x ^= 1;
+x = new A; x = new A(); x = new (f())(); x = new (a.b().c); x = new a.b.C(1, 2);
+x = f()(); x = a[b][c](d).e; x = (function () {})(); x = (() => 1)(); x = (a, b)(c);
+x = `plain`; x = `a${b}c${d + e}f`; x = tag`x${y}z`; x = `\n\t${`nested`}`;
+x = /re[gx]+/gi; x = /\//; x = a / /b/.exec(c).length;
+x = {get a() { return 1; }, set a(v) {}, m() {}, *gm() {}, async am() {}, [c]: d, 'e-f': g};
+x = [a, [b, [c]], {}, []]; x = [,]; x = [, ,];
+x = function named() { return named; };
+x = 'quote\'s' + "double\"s" + 'tab\t' + 'nl\n' + 'cr\r' + 'bs\\' + 'nul\0' + 'vt\v' + 'bell\x07';
+x = 'latin é ÿ' + 'bmp Ā ￿' + 'astral 😀' + 'lone \uD800 \uDFFF' + 'ls \u2028 ps \u2029';
+x = 0; x = 1; x = 1.5; x = .5; x = 10; x = 1e21; x = 1e-7; x = 0.000001; x = 1e300; x = 0x10; x = 0o17; x = 0b11;
+x = 123456789012345680000; x = 2e-7; x = 9007199254740993; x = 5e-324; x = 1.7976931348623157e308;
+x = 1 .toString(); x = 1.5.toString(); x = 1e21.toString(); x = 0x10.toString(); x = (-1).toString();
+x = a.in; x = a.if; x = {if: 1, class: 2};
+x = true; x = false; x = null; x = this; x = undefined;
+if (a) { } else { }
+if (a) if (b) c; else d;
+;
+{ let block = 1; }
+export_name: a;
@@ -0,0 +1,54 @@
+# A stand-in JS engine that speaks REPRL on fds 100-103. Each script is
+# one command: "crash" kills the engine with SIGSEGV, "hang" never
+# returns, "exit N" exits the script with N, "signal N" reports the
+# script as killed by signal N, and anything else exits with 0.
+import os
+import signal
+import struct
+import time
+
+REPRL_CRFD = 100
+REPRL_CWFD = 101
+REPRL_DRFD = 102
+
+def read_fd(fd, size):
+  buf = b''
+  while len(buf) < size:
+    chunk = os.read(fd, size - len(buf))
+    if len(chunk) == 0:
+      raise EOFError('REPRL control pipe closed')
+    buf += chunk
+  return buf
+
+def run(script):
+  if script == 'crash':
+    os.kill(os.getpid(), signal.SIGSEGV)
+  elif script == 'hang':
+    while True:
+      time.sleep(60)
+  elif script.startswith('exit '):
+    return int(script.split()[1])
+  return 0
+
+def main():
+  os.write(REPRL_CWFD, b'HELO')
+  if read_fd(REPRL_CRFD, 4) != b'HELO':
+    raise RuntimeError('REPRL handshake failed')
+
+  while True:
+    action = read_fd(REPRL_CRFD, 12)
+    if action[:4] != b'cexe':
+      raise RuntimeError('Unknown REPRL action %r' % action[:4])
+    size, = struct.unpack('<Q', action[4:])
+    script = os.pread(REPRL_DRFD, size, 0).decode('utf-8')
+
+    # The status word is the wait status of the script
+    script = script.strip()
+    if script.startswith('signal '):
+      status = int(script.split()[1]) & 0x7f
+    else:
+      status = (run(script) & 0xff) << 8
+    os.write(REPRL_CWFD, struct.pack('<i', status))
+
+if __name__ == '__main__':
+  main()
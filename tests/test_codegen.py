@@ -0,0 +1,114 @@
+import os
+import subprocess
+
+import pytest
+
+from utils import list_dir
+from utils import load_ast
+from utils.parse import Parser
+from utils.print import CodePrinter
+from utils.print import NativePrinter
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(TESTS_DIR), 'src')
+CORPUS_DIR = os.path.join(TESTS_DIR, 'data', 'corpus')
+
+# Literal values and the code escodegen prints for them
+LITERALS = [
+  (1e21, '1e+21'),
+  (0.000001, '0.000001'),
+  (1e-7, '1e-7'),
+  (2e-7, '2e-7'),
+  (123456789012345680000, '123456789012345680000'),
+  (1.7976931348623157e308, '1.7976931348623157e+308'),
+  (5e-324, '5e-324'),
+  (float('inf'), '1e+400'),
+  (0.1, '0.1'),
+  (16, '16'),
+  ('\ud800', "'\\uD800'"),
+  ('a\udfffb', "'a\\uDFFFb'"),
+  ('\U0001f600', "'\\uD83D\\uDE00'"),
+  ('  ', "'\\u2028\\u2029'"),
+  ('￿', "'\\uFFFF'"),
+  ('latin \xe9 \xff Ā', "'latin \xe9 \xff Ā'"),
+  ('\x00', "'\\0'"),
+  ('\x001', "'\\x001'"),
+  ('\x07\x0b', "'\\x07\\x0B'"),
+  ('\b\f\t\n\r\\', "'\\b\\f\\t\\n\\r\\\\'"),
+  ("it's", "'it\\'s'"),
+  ('say "hi"', '\'say "hi"\''),
+  (True, 'true'),
+  (None, 'null'),
+]
+
+# Number objects of member expressions and the code of obj.toString()
+MEMBER_OBJECTS = [
+  (1, '1 .toString()'),
+  (10, '10 .toString()'),
+  (0, '0 .toString()'),
+  (1.5, '1.5.toString()'),
+  (1e21, '1e+21.toString()'),
+]
+
+def expr_program(expr):
+  stmt = {'type': 'ExpressionStatement', 'expression': expr}
+  return {'type': 'Program', 'body': [stmt], 'sourceType': 'script'}
+
+def has_escodegen():
+  # The node printer and parser need the npm packages of the README
+  cmd = ['node', '-e', 'require("esprima"); require("escodegen")']
+  try:
+    return subprocess.run(cmd, cwd=SRC_DIR,
+                          stderr=subprocess.DEVNULL).returncode == 0
+  except FileNotFoundError:
+    return False
+
+def literal(value):
+  return {'type': 'Literal', 'value': value}
+
+def to_string(obj):
+  member = {'type': 'MemberExpression', 'computed': False,
+            'object': obj,
+            'property': {'type': 'Identifier', 'name': 'toString'}}
+  return {'type': 'CallExpression', 'callee': member, 'arguments': []}
+
+@pytest.fixture
+def node_printer(monkeypatch):
+  if not has_escodegen():
+    pytest.skip('esprima and escodegen are not installed for node')
+  monkeypatch.chdir(SRC_DIR)
+  return CodePrinter()
+
+@pytest.mark.parametrize('value, code', LITERALS)
+def test_literal(value, code):
+  printer = NativePrinter()
+  assert printer.ast2code(expr_program(literal(value))) == code + ';'
+
+@pytest.mark.parametrize('value, code', MEMBER_OBJECTS)
+def test_member_object(value, code):
+  printer = NativePrinter()
+  assert printer.ast2code(expr_program(to_string(literal(value)))) \
+    == code + ';'
+
+# Infinity has no JSON encoding, so it is not sent to escodegen
+@pytest.mark.parametrize('value, code',
+                         [(value, code) for value, code in LITERALS
+                          if value != float('inf')])
+def test_literal_escodegen(node_printer, value, code):
+  ast = expr_program(literal(value))
+  assert node_printer.ast2code(ast) == code + ';'
+
+@pytest.mark.parametrize('value, code', MEMBER_OBJECTS)
+def test_member_object_escodegen(node_printer, value, code):
+  ast = expr_program(to_string(literal(value)))
+  assert node_printer.ast2code(ast) == code + ';'
+
+def test_corpus(node_printer, tmp_path):
+  Parser().parse(CORPUS_DIR, str(tmp_path))
+  ast_list = [load_ast(ast_path)[1]
+              for ast_path in list_dir(str(tmp_path))]
+  assert len(ast_list) == len(list_dir(CORPUS_DIR))
+
+  printer = NativePrinter()
+  for ast in ast_list:
+    assert printer.ast2code(ast) == node_printer.ast2code(ast)
@@ -0,0 +1,74 @@
+import os
+import signal
+import sys
+
+import pytest
+
+from fuzz.engine import ReprlEngine
+from fuzz.engine import decode_status
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STAND_IN = os.path.join(TESTS_DIR, 'reprl_engine.py')
+
+@pytest.fixture
+def engine(tmp_path):
+  engine = ReprlEngine(sys.executable, [STAND_IN], str(tmp_path), 1,
+                       str(tmp_path))
+  yield engine
+  engine.close()
+
+def test_decode_status():
+  # A child that kills itself, and one that exits
+  code = 'import os, signal; os.kill(os.getpid(), signal.SIGABRT)'
+  pid = os.posix_spawn(sys.executable, [sys.executable, '-c', code],
+                       os.environ)
+  _, status = os.waitpid(pid, 0)
+  assert decode_status(status) == -signal.SIGABRT
+
+  code = 'import sys; sys.exit(7)'
+  pid = os.posix_spawn(sys.executable, [sys.executable, '-c', code],
+                       os.environ)
+  _, status = os.waitpid(pid, 0)
+  assert decode_status(status) == 7
+
+def test_exit(engine):
+  assert engine.run(b'print(1)') == 0
+  assert engine.run(b'exit 3') == 3
+  assert not engine.timed_out
+
+def test_signal(engine):
+  # A script killed by a signal leaves the engine running
+  engine.run(b'exit 0')
+  pid = engine._pid
+  assert engine.run(b'signal %d' % signal.SIGABRT) == -signal.SIGABRT
+  assert engine._pid == pid
+
+def test_reuse(engine):
+  # Scripts run in the same engine process until it dies
+  engine.run(b'exit 0')
+  pid = engine._pid
+  engine.run(b'exit 1')
+  assert engine._pid == pid
+
+def test_crash(engine):
+  engine.run(b'exit 0')
+  assert engine.run(b'crash') == -signal.SIGSEGV
+  assert engine._pid is None
+  assert not engine.timed_out
+
+  # The engine is restarted for the next script
+  assert engine.run(b'exit 2') == 2
+
+def test_timeout(engine):
+  assert engine.run(b'hang') == -signal.SIGKILL
+  assert engine.timed_out
+  assert engine._pid is None
+
+  assert engine.run(b'exit 0') == 0
+  assert not engine.timed_out
+
+def test_handshake(tmp_path):
+  engine = ReprlEngine(sys.executable, ['-c', 'pass'], str(tmp_path), 1,
+                       str(tmp_path))
+  with pytest.raises(RuntimeError):
+    engine.run(b'exit 0')
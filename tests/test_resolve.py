@@ -0,0 +1,37 @@
+import sys
+
+from fuzz.resolve import Budget
+from fuzz.resolve import set_budget
+from fuzz.resolve import trace_envs
+
+def nested_seed(depth):
+  # [[[...[1]...]]] in pre-order, as the seeds are laid out
+  literal = {'type': 'Literal', 'value': 1, 'raw': '1'}
+  nodes = [literal]
+  for _ in range(depth):
+    nodes.append({'type': 'ArrayExpression', 'elements': [nodes[-1]]})
+  stmt = {'type': 'ExpressionStatement', 'expression': nodes[-1]}
+  prog = {'type': 'Program', 'body': [stmt], 'sourceType': 'script'}
+  nodes.append(stmt)
+  nodes.append(prog)
+  return nodes[::-1]
+
+def test_trace():
+  nodes = nested_seed(3)
+  envs = trace_envs(nodes, [])
+  assert envs != None
+  assert len(envs) == len(nodes)
+
+def test_trace_deep():
+  # Tracing a seed deeper than the recursion limit gives up
+  nodes = nested_seed(sys.getrecursionlimit())
+  assert trace_envs(nodes, []) == None
+
+def test_trace_overrun():
+  nodes = nested_seed(100)
+  set_budget(Budget(10, 0))
+  try:
+    assert trace_envs(nodes, []) == None
+  finally:
+    set_budget(None)
+  assert trace_envs(nodes, []) != None